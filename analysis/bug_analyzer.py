@@ -1,12 +1,29 @@
 import os
 import json
-import glob
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import asdict
 from datetime import datetime
-from openai import OpenAI
+from typing import Callable
+from openai import OpenAI, RateLimitError
+from analysis.transcript_store import list_transcripts, load_transcript
+from bot.admission import BACKGROUND, admission
 
 TRANSCRIPTS_DIR = "transcripts"
 OUTPUTS_DIR = "outputs"
 BUG_REPORT_PATH = os.path.join(OUTPUTS_DIR, "bug_report.md")
+ANALYSIS_CACHE_DIR = os.path.join(OUTPUTS_DIR, "analysis_cache")
+
+ANALYSIS_MODEL = "gpt-4o-mini"
+
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "4"))
+MAX_RETRIES = 5
+
+_client: OpenAI | None = None
+_client_lock = threading.Lock()
 
 SYSTEM_PROMPT = """You are a senior QA engineer reviewing transcripts of AI voice agent calls.
 The agent is called Athena — a medical office AI scheduler for Pivot Point Orthopedics (part of PrettyGoodAI).
@@ -84,37 +101,126 @@ If no issues are found, return {"issues": []}.
 Return ONLY valid JSON — no markdown, no commentary outside the JSON."""
 
 
-def analyze_transcripts() -> None:
-    """Run GPT-4o-mini QA analysis on all transcripts and write outputs/bug_report.md."""
-    from scenarios.patient_scenarios import ALL_SCENARIOS
-    scenario_map = {s.id: s for s in ALL_SCENARIOS}
+def analyze_transcripts(max_workers: int | None = None) -> None:
+    """Run GPT-4o-mini QA analysis on all transcripts and write outputs/bug_report.md.
 
+    Transcripts are analyzed concurrently (ANALYSIS_CONCURRENCY workers by
+    default); the report keeps transcript order regardless of finish order.
+    Transcripts already handled by submit_analysis() come straight from the cache.
+    """
     os.makedirs(OUTPUTS_DIR, exist_ok=True)
 
-    json_files = sorted(glob.glob(os.path.join(TRANSCRIPTS_DIR, "*.json")))
+    json_files = list_transcripts(TRANSCRIPTS_DIR)
     if not json_files:
         print("[analyzer] No transcripts found — skipping analysis.")
         return
 
-    all_issues: list[dict] = []
-
-    for json_path in json_files:
-        with open(json_path) as f:
-            data = json.load(f)
+    workers = max(1, max_workers or ANALYSIS_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyzer") as pool:
+        results = list(pool.map(_analyze_or_skip, json_files))
 
-        scenario = scenario_map.get(data.get("scenario_id"))
-        issues = _analyze_single(data, scenario)
-        all_issues.extend(issues)
-        print(f"[analyzer] {data.get('scenario_id', json_path)}: {len(issues)} issue(s)")
+    # Cached and fresh results merge in transcript order
+    all_issues: list[dict] = [issue for issues, _ in results for issue in issues]
+    cached = sum(1 for _, hit in results if hit)
 
     _write_report(all_issues, len(json_files))
+    print(f"[analyzer] {cached} cached / {len(json_files) - cached} analyzed")
     print(f"[analyzer] Report written → {BUG_REPORT_PATH}")
     print(f"[analyzer] Total issues found: {len(all_issues)}")
 
 
-def _analyze_single(data: dict, scenario=None) -> list[dict]:
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def analyze_file(json_path: str) -> tuple[list[dict], bool]:
+    """Issues for one saved transcript (.json path or segment ref). Returns (issues, came_from_cache)."""
+    from scenarios.patient_scenarios import ALL_SCENARIOS
+
+    data = load_transcript(json_path)
+
+    scenario = next((s for s in ALL_SCENARIOS if s.id == data.get("scenario_id")), None)
+    key = _cache_key(data, scenario)
+    issues = _load_cached(key)
+    if issues is not None:
+        return issues, True
+
+    issues = _analyze_single(data, scenario, cache_key=key)
+    print(f"[analyzer] {data.get('scenario_id', json_path)}: {len(issues)} issue(s)")
+    return issues, False
+
 
+def _analyze_or_skip(json_path: str) -> tuple[list[dict], bool]:
+    """analyze_file() for the batch report: a failed transcript contributes no issues instead of aborting the run."""
+    try:
+        return analyze_file(json_path)
+    except Exception as e:
+        print(f"[analyzer] Error analyzing {json_path}: {e}")
+        return [], False
+
+
+# ── Pipelined per-call analysis ───────────────────────────────────────────────
+
+_pipeline: ThreadPoolExecutor | None = None
+_pending: set[Future] = set()
+_pipeline_lock = threading.Lock()
+
+
+def submit_analysis(
+    json_path: str,
+    on_update: Callable[[str, int | None], None] | None = None,
+) -> Future:
+    """
+    Analyze a freshly saved transcript in the background.
+
+    on_update(status, issue_count) is called with "queued", "running", then
+    "done" (with the issue count) or "error".  The result lands in the analysis
+    cache, so the end-of-run analyze_transcripts() only assembles the report.
+    """
+    global _pipeline
+
+    def notify(status: str, issue_count: int | None = None) -> None:
+        if on_update:
+            try:
+                on_update(status, issue_count)
+            except Exception as e:
+                print(f"[analyzer] Progress callback failed: {e}")
+
+    def run() -> list[dict]:
+        notify("running")
+        try:
+            issues, _ = analyze_file(json_path)
+        except Exception as e:
+            print(f"[analyzer] Error analyzing {json_path}: {e}")
+            notify("error")
+            raise
+        notify("done", len(issues))
+        return issues
+
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = ThreadPoolExecutor(max_workers=ANALYSIS_CONCURRENCY, thread_name_prefix="pipeline")
+        notify("queued")
+        future = _pipeline.submit(run)
+        _pending.add(future)
+    future.add_done_callback(_discard_pending)
+    return future
+
+
+def wait_for_pending(timeout: float | None = None) -> bool:
+    """Block until every submitted analysis has finished. Returns False on timeout."""
+    with _pipeline_lock:
+        pending = list(_pending)
+    _, not_done = wait(pending, timeout=timeout)
+    return not not_done
+
+
+def _discard_pending(future: Future) -> None:
+    with _pipeline_lock:
+        _pending.discard(future)
+
+
+def _analyze_single(data: dict, scenario=None, cache_key: str | None = None) -> list[dict]:
+    """Ask GPT for this transcript's issues; stores them under cache_key on success.
+
+    API and parse errors propagate, so a failure is never mistaken for (or cached as) zero issues.
+    """
     lines = [
         f"Scenario: {data.get('scenario_name')} (ID: {data.get('scenario_id')})",
         f"Patient: {data.get('patient_name')}",
@@ -132,22 +238,101 @@ def _analyze_single(data: dict, scenario=None) -> list[dict]:
 
     transcript_text = "\n".join(lines)
 
+    response = _create_with_backoff(
+        model=ANALYSIS_MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Analyze this transcript:\n\n{transcript_text}"},
+        ],
+        max_tokens=1500,
+        temperature=0.2,
+        response_format={"type": "json_object"},
+    )
+    parsed = json.loads(response.choices[0].message.content)
+    issues = parsed.get("issues", [])
+
+    if cache_key:
+        _store_cached(cache_key, data, issues)
+    return issues
+
+
+# ── Incremental results cache ─────────────────────────────────────────────────
+
+def _cache_key(data: dict, scenario=None) -> str:
+    """Content hash of everything that shapes the analysis: transcript, scenario, prompt, model."""
+    payload = json.dumps(
+        {
+            "transcript": data,
+            "scenario": asdict(scenario) if scenario else None,
+            "system_prompt": hashlib.sha256(SYSTEM_PROMPT.encode()).hexdigest(),
+            "model": ANALYSIS_MODEL,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _load_cached(key: str) -> list[dict] | None:
+    path = os.path.join(ANALYSIS_CACHE_DIR, f"{key}.json")
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": f"Analyze this transcript:\n\n{transcript_text}"},
-            ],
-            max_tokens=1500,
-            temperature=0.2,
-            response_format={"type": "json_object"},
-        )
-        parsed = json.loads(response.choices[0].message.content)
-        return parsed.get("issues", [])
-    except Exception as e:
-        print(f"[analyzer] Error analyzing {data.get('scenario_id', '?')}: {e}")
-        return []
+        with open(path) as f:
+            return json.load(f)["issues"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _store_cached(key: str, data: dict, issues: list[dict]) -> None:
+    """Best effort: a cache that can't be written (disk full, read-only) never fails the analysis."""
+    path = os.path.join(ANALYSIS_CACHE_DIR, f"{key}.json")
+    tmp_path = f"{path}.tmp"
+    try:
+        os.makedirs(ANALYSIS_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "call_sid": data.get("call_sid"),
+                    "scenario_id": data.get("scenario_id"),
+                    "analyzed_at": datetime.utcnow().isoformat(),
+                    "issues": issues,
+                },
+                f,
+            )
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[analyzer] Could not cache analysis {key[:12]}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _create_with_backoff(**kwargs):
+    """chat.completions.create with exponential backoff (plus jitter) on 429s."""
+    for attempt in range(MAX_RETRIES):
+        try:
+            # Background priority: live patient turns are always admitted first
+            with admission.slot(BACKGROUND):
+                return _get_client().chat.completions.create(**kwargs)
+        except RateLimitError as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            retry_after = e.response.headers.get("retry-after") if e.response is not None else None
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = 2 ** attempt
+            delay += random.uniform(0, 0.5)
+            admission.backoff(delay)
+            print(f"[analyzer] Rate limited — retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def _get_client() -> OpenAI:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return _client
 
 
 def _write_report(issues: list[dict], total_calls: int) -> None:
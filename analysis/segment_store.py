@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Segmented transcript archive: append-only JSONL segments plus a SQLite catalog.
+
+Each transcript is one record appended to the current segment file, optionally
+compressed as its own gzip member / zstd frame so it can be read back on its
+own.  The catalog maps call_sid → (segment, byte offset, length) along with
+scenario_id, timestamp and turn_count, so readers can seek straight to a
+record or stream a scenario / date range without parsing the whole archive.
+The catalog also records each record's codec, so segments written under an
+earlier TRANSCRIPT_COMPRESSION setting stay readable after it changes.
+
+Usage:
+  python -m analysis.segment_store list [--scenario 02_weekend_scheduling] [--since 2026-02-01]
+  python -m analysis.segment_store show <call_sid>          # renders the .txt view
+  python -m analysis.segment_store import transcripts/      # load existing *.json files
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Iterator, Optional
+
+from analysis.transcript_store import render_text
+
+try:
+    import zstandard
+except ImportError:  # optional — only needed for compression="zstd"
+    zstandard = None
+
+SEGMENTS_DIR = os.path.join("transcripts", "segments")
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+_EXTENSIONS = {"none": ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+
+class SegmentStore:
+    def __init__(
+        self,
+        root: str = SEGMENTS_DIR,
+        compression: str = "gzip",
+        segment_max_bytes: int = SEGMENT_MAX_BYTES,
+    ) -> None:
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"Unknown compression {compression!r} (expected none, gzip or zstd)")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("compression='zstd' needs the zstandard package (pip install zstandard)")
+
+        self.root = root
+        self.compression = compression
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+
+        os.makedirs(root, exist_ok=True)
+        # Keep numbering across codecs; only append to the last segment if it has ours
+        existing = sorted(glob.glob(os.path.join(root, "segment-*")), key=_segment_number)
+        self._segment = os.path.basename(existing[-1]) if existing else ""
+        self._segment_size = os.path.getsize(existing[-1]) if existing else 0
+        if self._segment and _codec_of(self._segment) != compression:
+            self._segment_size = segment_max_bytes
+        self._db = sqlite3.connect(os.path.join(root, "catalog.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                call_sid    TEXT PRIMARY KEY,
+                scenario_id TEXT NOT NULL,
+                timestamp   TEXT NOT NULL,
+                turn_count  INTEGER NOT NULL,
+                segment     TEXT NOT NULL,
+                offset      INTEGER NOT NULL,
+                length      INTEGER NOT NULL,
+                compression TEXT
+            );
+            CREATE INDEX IF NOT EXISTS records_scenario ON records (scenario_id, timestamp);
+            CREATE INDEX IF NOT EXISTS records_timestamp ON records (timestamp);
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(records)")}
+        if "compression" not in columns:
+            # Catalogs from before the codec was recorded: the segment's extension says it
+            self._db.execute("ALTER TABLE records ADD COLUMN compression TEXT")
+            for codec, extension in _EXTENSIONS.items():
+                self._db.execute(
+                    "UPDATE records SET compression = ? WHERE segment LIKE ?", (codec, f"%{extension}")
+                )
+        self._db.commit()
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    def append(self, record: dict) -> dict:
+        """Append a transcript record (transcript JSON schema) and index it. Returns its catalog entry."""
+        payload = self._encode(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+        with self._lock:
+            segment = self._current_segment(len(payload))
+            path = os.path.join(self.root, segment)
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+            entry = {
+                "call_sid": record["call_sid"],
+                "scenario_id": record.get("scenario_id", "unknown"),
+                "timestamp": record.get("timestamp", ""),
+                "turn_count": record.get("turn_count", 0),
+                "segment": segment,
+                "offset": offset,
+                "length": len(payload),
+                "compression": self.compression,
+            }
+            self._db.execute(
+                "INSERT OR REPLACE INTO records "
+                "(call_sid, scenario_id, timestamp, turn_count, segment, offset, length, compression) VALUES "
+                "(:call_sid, :scenario_id, :timestamp, :turn_count, :segment, :offset, :length, :compression)",
+                entry,
+            )
+            self._db.commit()
+        return entry
+
+    # ── Reading ───────────────────────────────────────────────────────────────
+
+    def entries(
+        self,
+        scenario_id: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> list[dict]:
+        """Catalog entries matching the filters, ordered by scenario then time (like the file names)."""
+        clauses, params = [], []
+        if scenario_id:
+            clauses.append("scenario_id = ?")
+            params.append(scenario_id)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            cursor = self._db.execute(
+                f"SELECT call_sid, scenario_id, timestamp, turn_count, segment, offset, length, compression "
+                f"FROM records {where} ORDER BY scenario_id, timestamp",
+                params,
+            )
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get(self, call_sid: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT segment, offset, length, compression FROM records WHERE call_sid = ?", (call_sid,)
+            ).fetchone()
+        return self._read(*row) if row else None
+
+    def iter_records(self, **filters) -> Iterator[dict]:
+        """Stream full records for the entries matching filters (see entries())."""
+        for entry in self.entries(**filters):
+            yield self._read(entry["segment"], entry["offset"], entry["length"], entry["compression"])
+
+    def _read(self, segment: str, offset: int, length: int, compression: Optional[str]) -> dict:
+        with open(os.path.join(self.root, segment), "rb") as f:
+            f.seek(offset)
+            return json.loads(_decode(f.read(length), compression or _codec_of(segment)))
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _current_segment(self, incoming: int) -> str:
+        """Segment to append to, rolling over once the current one would pass segment_max_bytes."""
+        if not self._segment or self._segment_size + incoming > self.segment_max_bytes:
+            number = _segment_number(self._segment) + 1 if self._segment else 1
+            self._segment = f"segment-{number:06d}{_EXTENSIONS[self.compression]}"
+            self._segment_size = 0
+        self._segment_size += incoming
+        return self._segment
+
+    def _encode(self, data: bytes) -> bytes:
+        if self.compression == "gzip":
+            return gzip.compress(data)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor().compress(data)
+        return data
+
+
+def _segment_number(name: str) -> int:
+    return int(os.path.basename(name).split("-")[1].split(".")[0])
+
+
+def _codec_of(segment: str) -> str:
+    for codec, extension in _EXTENSIONS.items():
+        if segment.endswith(extension):
+            return codec
+    return "none"
+
+
+def _decode(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("this record is zstd-compressed; reading it needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect the segmented transcript archive")
+    parser.add_argument("--root", default=SEGMENTS_DIR)
+    parser.add_argument("--compression", default=os.getenv("TRANSCRIPT_COMPRESSION", "gzip"))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    list_cmd = sub.add_parser("list", help="list catalog entries")
+    list_cmd.add_argument("--scenario")
+    list_cmd.add_argument("--since", help="ISO timestamp (inclusive)")
+    list_cmd.add_argument("--until", help="ISO timestamp (exclusive)")
+
+    show_cmd = sub.add_parser("show", help="render one transcript as text")
+    show_cmd.add_argument("call_sid")
+
+    import_cmd = sub.add_parser("import", help="append existing transcript *.json files")
+    import_cmd.add_argument("directory")
+
+    args = parser.parse_args()
+    store = SegmentStore(args.root, args.compression)
+
+    if args.command == "list":
+        for e in store.entries(args.scenario, args.since, args.until):
+            print(f"{e['timestamp']}  {e['scenario_id']:<28} {e['turn_count']:>3} turns  {e['call_sid']}")
+    elif args.command == "show":
+        record = store.get(args.call_sid)
+        if not record:
+            sys.exit(f"[segments] {args.call_sid} not found")
+        sys.stdout.write(render_text(record))
+    elif args.command == "import":
+        paths = sorted(glob.glob(os.path.join(args.directory, "*.json")))
+        for path in paths:
+            with open(path) as f:
+                store.append(json.load(f))
+        print(f"[segments] Imported {len(paths)} transcript(s) → {args.root}")
+
+
+if __name__ == "__main__":
+    main()
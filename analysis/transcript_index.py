@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Full-text index over transcript turns for bug triage.
+
+Backed by an SQLite FTS5 table, i.e. an inverted index from token to
+(call, turn, role) postings.  save_transcript() adds each call as it is
+written; `build` (re)indexes an existing archive.
+
+Usage:
+  python -m analysis.transcript_index build
+  python -m analysis.transcript_index search saturday --role agent \\
+      --after "patient:weekday" --scenario 02_weekend_scheduling
+  python -m analysis.transcript_index search "license approval" --role agent
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Optional
+
+INDEX_PATH = os.path.join("transcripts", "index.sqlite")
+
+
+class TranscriptIndex:
+    def __init__(self, path: str = INDEX_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.executescript(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS turns USING fts5(
+                text,
+                call_sid UNINDEXED,
+                scenario_id UNINDEXED,
+                timestamp UNINDEXED,
+                turn UNINDEXED,
+                role UNINDEXED
+            );
+            CREATE TABLE IF NOT EXISTS calls (
+                call_sid TEXT PRIMARY KEY, scenario_id TEXT, timestamp TEXT, first_rowid INTEGER, last_rowid INTEGER
+            );
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(calls)")}
+        if "first_rowid" not in columns:
+            # Indexes from before the row range was kept: each call's turns went in as one contiguous batch
+            self._db.execute("ALTER TABLE calls ADD COLUMN first_rowid INTEGER")
+            self._db.execute("ALTER TABLE calls ADD COLUMN last_rowid INTEGER")
+            self._db.execute(
+                """
+                UPDATE calls SET (first_rowid, last_rowid) = (
+                    SELECT MIN(rowid), MAX(rowid) FROM turns WHERE turns.call_sid = calls.call_sid
+                )
+                """
+            )
+        self._db.commit()
+
+    def add(self, record: dict) -> None:
+        """Index (or re-index) one transcript record."""
+        call_sid = record["call_sid"]
+        scenario_id = record.get("scenario_id", "unknown")
+        timestamp = record.get("timestamp", "")
+        turns = record.get("transcript", [])
+        with self._lock:
+            # call_sid is UNINDEXED in the FTS table, so find a re-indexed call's
+            # turns by the rowid range kept in calls rather than scanning for it
+            previous = self._db.execute(
+                "SELECT first_rowid, last_rowid FROM calls WHERE call_sid = ?", (call_sid,)
+            ).fetchone()
+            if previous and previous[0] is not None:
+                self._db.execute("DELETE FROM turns WHERE rowid BETWEEN ? AND ?", previous)
+
+            last = self._db.execute("SELECT rowid FROM turns ORDER BY rowid DESC LIMIT 1").fetchone()
+            first_rowid = (last[0] if last else 0) + 1
+            self._db.executemany(
+                "INSERT INTO turns (rowid, text, call_sid, scenario_id, timestamp, turn, role) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (first_rowid + i, turn["text"], call_sid, scenario_id, timestamp, i + 1, turn["role"])
+                    for i, turn in enumerate(turns)
+                ],
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO calls VALUES (?, ?, ?, ?, ?)",
+                (call_sid, scenario_id, timestamp, first_rowid, first_rowid + len(turns) - 1 if turns else None),
+            )
+            self._db.commit()
+
+    def search(
+        self,
+        query: str,
+        role: Optional[str] = None,
+        scenario_id: Optional[str] = None,
+        after: Optional[tuple[Optional[str], str]] = None,
+        raw: bool = False,
+        limit: int = 200,
+    ) -> list[dict]:
+        """
+        Turns matching query (a phrase unless raw=True, then an FTS5 expression).
+
+        after=(role, phrase) keeps only hits that come later in the same call
+        than a turn matching phrase (by role, if given) — e.g. the agent saying
+        "saturday" after the patient asked for a "weekday".
+        """
+        hits = self._match(query, role, scenario_id, raw)
+
+        if after:
+            after_role, after_query = after
+            first_turn: dict[str, int] = {}
+            for hit in self._match(after_query, after_role, scenario_id, raw):
+                first_turn[hit["call_sid"]] = min(hit["turn"], first_turn.get(hit["call_sid"], hit["turn"]))
+            hits = [h for h in hits if h["call_sid"] in first_turn and h["turn"] > first_turn[h["call_sid"]]]
+
+        return hits[:limit]
+
+    def _match(self, query: str, role: Optional[str], scenario_id: Optional[str], raw: bool) -> list[dict]:
+        expression = query if raw else _phrase(query)
+        sql = "SELECT call_sid, scenario_id, timestamp, turn, role, text FROM turns WHERE turns MATCH ?"
+        params: list = [expression]
+        if role:
+            sql += " AND role = ?"
+            params.append(role)
+        if scenario_id:
+            sql += " AND scenario_id = ?"
+            params.append(scenario_id)
+        sql += " ORDER BY timestamp, call_sid, turn"
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        keys = ("call_sid", "scenario_id", "timestamp", "turn", "role", "text")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def call_count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+
+
+def _phrase(text: str) -> str:
+    """Quote text as an FTS5 phrase query."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+_index: Optional[TranscriptIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> TranscriptIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TranscriptIndex()
+        return _index
+
+
+def main() -> None:
+    from analysis.transcript_store import list_transcripts, load_transcript
+
+    parser = argparse.ArgumentParser(description="Search transcript turns")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("build", help="index every saved transcript")
+
+    search_cmd = sub.add_parser("search", help="find turns containing a phrase")
+    search_cmd.add_argument("query")
+    search_cmd.add_argument("--role", choices=["agent", "patient"])
+    search_cmd.add_argument("--scenario")
+    search_cmd.add_argument("--after", metavar="[ROLE:]PHRASE",
+                            help="only hits later in the call than a turn matching PHRASE")
+    search_cmd.add_argument("--raw", action="store_true", help="treat query as an FTS5 expression")
+    search_cmd.add_argument("--limit", type=int, default=200)
+
+    args = parser.parse_args()
+    index = get_index()
+
+    if args.command == "build":
+        refs = list_transcripts()
+        start = time.perf_counter()
+        for ref in refs:
+            index.add(load_transcript(ref))
+        print(f"[index] Indexed {len(refs)} transcript(s) in {time.perf_counter() - start:.2f}s → {INDEX_PATH}")
+        return
+
+    after = None
+    if args.after:
+        role, sep, phrase = args.after.partition(":")
+        after = (role, phrase) if sep and role in ("agent", "patient") else (None, args.after)
+
+    start = time.perf_counter()
+    hits = index.search(args.query, args.role, args.scenario, after, args.raw, args.limit)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for h in hits:
+        print(f"{h['scenario_id']:<26} {h['call_sid']}  turn {h['turn']:>2} [{h['role']:<7}] {h['text']}")
+    print(f"[index] {len(hits)} hit(s) across {index.call_count()} call(s) in {elapsed_ms:.1f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,281 @@
 import os
+import glob
 import json
+import queue
+import atexit
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from datetime import datetime
 
 TRANSCRIPTS_DIR = "transcripts"
 
+# "files" writes <scenario>_<timestamp>.txt/.json; "segments" appends to the
+# compressed segment archive (analysis/segment_store.py) and renders .txt on demand.
+# Only the main transcripts/ directory uses segments; other directories get files.
+TRANSCRIPT_BACKEND = os.getenv("TRANSCRIPT_BACKEND", "files")
+SEGMENT_REF_PREFIX = "segment:"
 
-def save_transcript(call_sid: str, session_info: dict, history: list[dict]) -> tuple[str, str]:
+# Keep the full-text turn index (analysis/transcript_index.py) up to date as calls are saved
+INDEX_ON_SAVE = os.getenv("TRANSCRIPT_INDEX", "1") != "0"
+
+WRITER_QUEUE_SIZE = 256
+WRITER_BATCH_SIZE = 32
+
+
+def save_transcript(
+    call_sid: str,
+    session_info: dict,
+    history: list[dict],
+    transcripts_dir: str = TRANSCRIPTS_DIR,
+    name_suffix: str = "",
+) -> tuple[str, str]:
     """
     Save the conversation transcript as both a human-readable .txt and a
     machine-readable .json. Also persists the call record to Supabase.
+    name_suffix keeps file names unique when many calls of one scenario
+    finish within the same second (e.g. offline runs).
     Returns (txt_path, json_path).
     """
-    os.makedirs(TRANSCRIPTS_DIR, exist_ok=True)
-
-    scenario_id = session_info.get("scenario_id", "unknown")
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    base_name = f"{scenario_id}_{timestamp}"
-
-    # ── Plain text (human-readable, for repo submission) ─────────────────────
-    txt_path = os.path.join(TRANSCRIPTS_DIR, f"{base_name}.txt")
-    with open(txt_path, "w") as f:
-        f.write(f"CALL:     {session_info.get('scenario_name', 'Unknown')}\n")
-        f.write(f"PATIENT:  {session_info.get('patient_name', 'Unknown')}\n")
-        f.write(f"DATE:     {datetime.utcnow().isoformat()}Z\n")
-        f.write(f"CALL SID: {call_sid}\n")
-        f.write(f"DURATION: {session_info.get('elapsed_seconds', 0)}s\n")
-        f.write(f"TURNS:    {session_info.get('turn_count', 0)}\n")
-        f.write("\n--- TRANSCRIPT ---\n\n")
-        for turn in history:
-            label = "[PATIENT]" if turn["role"] == "patient" else "[AGENT]  "
-            f.write(f"{label} {turn['text']}\n\n")
-        f.write("--- END TRANSCRIPT ---\n")
-
-    # ── JSON (for bug analysis) ───────────────────────────────────────────────
-    json_path = os.path.join(TRANSCRIPTS_DIR, f"{base_name}.json")
-    with open(json_path, "w") as f:
-        json.dump(
-            {
-                "call_sid": call_sid,
-                "scenario_id": scenario_id,
-                "scenario_name": session_info.get("scenario_name"),
-                "patient_name": session_info.get("patient_name"),
-                "timestamp": datetime.utcnow().isoformat(),
-                "elapsed_seconds": session_info.get("elapsed_seconds", 0),
-                "turn_count": session_info.get("turn_count", 0),
-                "transcript": history,
-            },
-            f,
-            indent=2,
-        )
-
-    print(f"[transcript] Saved → {txt_path}")
-    return txt_path, json_path
+    record = _TranscriptRecord(call_sid, session_info, history, transcripts_dir, name_suffix)
+    paths = record.write()
+    print(f"[transcript] Saved → {paths[0] or paths[1]}")
+    return paths
+
+
+def save_transcript_async(
+    call_sid: str,
+    session_info: dict,
+    history: list[dict],
+    transcripts_dir: str = TRANSCRIPTS_DIR,
+    name_suffix: str = "",
+) -> Future:
+    """
+    Queue the transcript for the background writer and return immediately.
+
+    The returned future resolves to (txt_path, json_path) once both files are
+    written and fsynced.  If the writer queue is full the write happens
+    synchronously in the caller instead of dropping the transcript.
+    """
+    record = _TranscriptRecord(call_sid, session_info, list(history), transcripts_dir, name_suffix)
+    return _get_writer().submit(record)
+
+
+def flush_transcripts(timeout: float | None = None) -> bool:
+    """Wait until every queued transcript is on disk. Returns False on timeout."""
+    return _writer.flush(timeout) if _writer else True
+
+
+def list_transcripts(transcripts_dir: str = TRANSCRIPTS_DIR) -> list[str]:
+    """References to every saved transcript, in scenario/time order, for load_transcript()."""
+    if TRANSCRIPT_BACKEND == "segments" and transcripts_dir == TRANSCRIPTS_DIR:
+        return [SEGMENT_REF_PREFIX + e["call_sid"] for e in get_segment_store().entries()]
+    return sorted(glob.glob(os.path.join(transcripts_dir, "*.json")))
+
+
+def load_transcript(ref: str) -> dict:
+    """Load a transcript record from a .json path or a segment:<call_sid> reference."""
+    if ref.startswith(SEGMENT_REF_PREFIX):
+        record = get_segment_store().get(ref[len(SEGMENT_REF_PREFIX):])
+        if record is None:
+            raise FileNotFoundError(ref)
+        return record
+    with open(ref) as f:
+        return json.load(f)
+
+
+def render_text(record: dict) -> str:
+    """The human-readable .txt view of a transcript record."""
+    lines = [
+        f"CALL:     {record.get('scenario_name') or 'Unknown'}",
+        f"PATIENT:  {record.get('patient_name') or 'Unknown'}",
+        f"DATE:     {record.get('timestamp', '')}Z",
+        f"CALL SID: {record.get('call_sid', '')}",
+        f"DURATION: {record.get('elapsed_seconds', 0)}s",
+        f"TURNS:    {record.get('turn_count', 0)}",
+        "",
+        "--- TRANSCRIPT ---",
+        "",
+    ]
+    for turn in record.get("transcript", []):
+        label = "[PATIENT]" if turn["role"] == "patient" else "[AGENT]  "
+        lines.extend([f"{label} {turn['text']}", ""])
+    lines.append("--- END TRANSCRIPT ---")
+    return "\n".join(lines) + "\n"
+
+
+_segment_store = None
+_segment_store_lock = threading.Lock()
+
+
+def get_segment_store():
+    """Shared SegmentStore for TRANSCRIPT_BACKEND=segments (compression from TRANSCRIPT_COMPRESSION)."""
+    global _segment_store
+    from analysis.segment_store import SegmentStore
+
+    with _segment_store_lock:
+        if _segment_store is None:
+            _segment_store = SegmentStore(compression=os.getenv("TRANSCRIPT_COMPRESSION", "gzip"))
+        return _segment_store
+
+
+class _TranscriptRecord:
+    """One transcript waiting to be written; file names and timestamps are fixed at call end."""
+
+    def __init__(self, call_sid, session_info, history, transcripts_dir, name_suffix) -> None:
+        self.call_sid = call_sid
+        self.session_info = session_info
+        self.history = history
+        self.transcripts_dir = transcripts_dir
+        self.ended_at = datetime.utcnow()
+
+        scenario_id = session_info.get("scenario_id", "unknown")
+        self.scenario_id = scenario_id
+        base_name = f"{scenario_id}_{self.ended_at.strftime('%Y%m%d_%H%M%S')}{name_suffix}"
+        self.txt_path = os.path.join(transcripts_dir, f"{base_name}.txt")
+        self.json_path = os.path.join(transcripts_dir, f"{base_name}.json")
+
+    def to_dict(self) -> dict:
+        info = self.session_info
+        return {
+            "call_sid": self.call_sid,
+            "scenario_id": self.scenario_id,
+            "scenario_name": info.get("scenario_name"),
+            "patient_name": info.get("patient_name"),
+            "timestamp": self.ended_at.isoformat(),
+            "elapsed_seconds": info.get("elapsed_seconds", 0),
+            "turn_count": info.get("turn_count", 0),
+            "transcript": self.history,
+        }
+
+    def write(self, fsync: bool = False) -> tuple[str | None, str]:
+        """Persist the record. Returns (txt_path, json_path), or (None, segment ref) for segments."""
+        record = self.to_dict()
+        paths = self._persist(record, fsync)
+
+        # Only the main archive is indexed — not offline runs in other directories
+        if INDEX_ON_SAVE and self.transcripts_dir == TRANSCRIPTS_DIR:
+            try:
+                from analysis.transcript_index import get_index
+                get_index().add(record)
+            except Exception as e:
+                print(f"[transcript] Indexing {self.call_sid} failed: {e}")
+        return paths
+
+    def _persist(self, record: dict, fsync: bool) -> tuple[str | None, str]:
+        # The segment archive is the main transcripts/ directory's; runs saved
+        # elsewhere (offline, benchmarks) keep writing plain files so they stay
+        # out of what list_transcripts() and the bug analyzer read
+        if TRANSCRIPT_BACKEND == "segments" and self.transcripts_dir == TRANSCRIPTS_DIR:
+            # The segment store fsyncs every append itself
+            get_segment_store().append(record)
+            return None, SEGMENT_REF_PREFIX + self.call_sid
+
+        os.makedirs(self.transcripts_dir, exist_ok=True)
+
+        # ── Plain text (human-readable, for repo submission) ─────────────────
+        with open(self.txt_path, "w") as f:
+            f.write(render_text(record))
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        # ── JSON (for bug analysis) ───────────────────────────────────────────
+        with open(self.json_path, "w") as f:
+            json.dump(record, f, indent=2)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        return self.txt_path, self.json_path
+
+
+# ── Background writer ─────────────────────────────────────────────────────────
+
+class _TranscriptWriter:
+    """Single thread draining a bounded queue, writing and fsyncing transcripts in batches."""
+
+    def __init__(self, maxsize: int = WRITER_QUEUE_SIZE, batch_size: int = WRITER_BATCH_SIZE) -> None:
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._batch_size = batch_size
+        self._thread = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: _TranscriptRecord) -> Future:
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((record, future))
+        except queue.Full:
+            print("[transcript] Writer queue full — writing synchronously")
+            self._write_batch([(record, future)])
+        return future
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until everything queued so far has been written."""
+        marker: Future = Future()
+        self._queue.put((None, marker))
+        try:
+            marker.result(timeout=timeout)
+            return True
+        except FutureTimeout:
+            return False
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: list) -> None:
+        written = []
+        for record, future in batch:
+            if record is None:
+                continue
+            try:
+                paths = record.write(fsync=True)
+            except Exception as e:
+                print(f"[transcript] Failed to save {record.call_sid}: {e}")
+                future.set_exception(e)
+                continue
+            written.append((paths, future))
+
+        # One directory fsync per batch makes the new entries durable
+        for directory in {os.path.dirname(paths[0]) or "." for paths, _ in written if paths[0]}:
+            _fsync_dir(directory)
+
+        for paths, future in written:
+            print(f"[transcript] Saved → {paths[0] or paths[1]}")
+            future.set_result(paths)
+        # Flush markers resolve only after everything queued before them
+        for record, future in batch:
+            if record is None:
+                future.set_result(None)
+
+
+def _fsync_dir(directory: str) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+_writer: _TranscriptWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> _TranscriptWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _TranscriptWriter()
+            atexit.register(flush_transcripts, 10.0)
+        return _writer
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Call placement throughput against the local Twilio fake.
+
+Places --calls calls one at a time with a fresh Client per call (the old
+place_call), then through caller.place_calls on the shared pooled client,
+and prints calls/second for each.  No real calls are made.
+
+Usage:
+  python -m benchmarks.bench_placement [--calls 40] [--median-ms 250]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from benchmarks.openai_stub import LatencyModel  # noqa: E402
+from benchmarks.twilio_stub import serve  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--median-ms", type=float, default=250)
+    args = parser.parse_args()
+
+    server = serve(0, LatencyModel(args.median_ms, 0.3), background=True)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    os.environ["TWILIO_API_BASE_URL"] = base_url
+    os.environ.setdefault("TWILIO_ACCOUNT_SID", "AC" + "0" * 32)
+    os.environ.setdefault("TWILIO_AUTH_TOKEN", "stub")
+
+    from twilio.rest import Client
+    from bot import caller
+    from bot.conversation_manager import manager
+    from scenarios.patient_scenarios import ALL_SCENARIOS
+
+    patient = {"full_name": "Bench Patient", "dob": "2000-01-01"}
+    scenarios = [ALL_SCENARIOS[n % len(ALL_SCENARIOS)] for n in range(args.calls)]
+
+    # ── Serial, fresh client per call ────────────────────────────────────────
+    start = time.perf_counter()
+    for _ in scenarios:
+        client = Client(os.environ["TWILIO_ACCOUNT_SID"], os.environ["TWILIO_AUTH_TOKEN"])
+        client.api.base_url = base_url
+        client.calls.create(to=caller.TARGET_NUMBER, from_="+15550000000", url="http://bench/voice")
+    serial = time.perf_counter() - start
+
+    # ── place_calls on the shared client ─────────────────────────────────────
+    start = time.perf_counter()
+    futures = caller.place_calls(scenarios, "http://bench", patient)
+    sids = [f.result() for f in futures]
+    batched = time.perf_counter() - start
+
+    for sid in sids:
+        manager.mark_complete(sid)
+
+    print(f"[bench] {args.calls} calls, fake Twilio median {args.median_ms:.0f}ms, "
+          f"{caller.PLACEMENT_WORKERS} placement workers")
+    print(f"[bench] serial, new client:  {args.calls / serial:6.1f} calls/s ({serial:.2f}s)")
+    print(f"[bench] place_calls, pooled: {args.calls / batched:6.1f} calls/s ({batched:.2f}s)")
+    print(f"[bench] calls received by fake: {server.counters['calls']}")
+    return 0 if len(set(sids)) == args.calls else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-pattern tier-1 regexes vs the compiled Tier1Classifier.
+
+Replays every agent turn in transcripts/*.json through both implementations,
+fails if any label differs, and prints the per-utterance cost of each.
+
+Usage:
+  python -m benchmarks.bench_tier1 [--repeat 200]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from bot.llm_patient import _is_identity_question, _tier1_classify, Tier1Classifier  # noqa: E402
+
+
+def load_agent_turns() -> list[tuple[str, str]]:
+    """Return (patient_name, agent_text) for every agent turn in the archive."""
+    turns = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "transcripts", "*.json"))):
+        with open(path) as f:
+            data = json.load(f)
+        name = data.get("patient_name") or ""
+        for turn in data.get("transcript", []):
+            if turn["role"] == "agent":
+                turns.append((name, turn["text"]))
+    return turns
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the corpus per timing")
+    args = parser.parse_args()
+
+    turns = load_agent_turns()
+    if not turns:
+        print("[bench] No agent turns found in transcripts/ — nothing to do.")
+        return 1
+
+    classifiers = {name: Tier1Classifier(name) for name, _ in turns}
+
+    # ── Equivalence ──────────────────────────────────────────────────────────
+    mismatches = 0
+    for name, text in turns:
+        expected = (_tier1_classify(text), _is_identity_question(text, name))
+        actual = classifiers[name].classify(text)
+        if expected != actual:
+            mismatches += 1
+            print(f"[bench] MISMATCH {text!r}: reference={expected} compiled={actual}")
+
+    # ── Timing ───────────────────────────────────────────────────────────────
+    def bench_reference() -> None:
+        for name, text in turns:
+            _tier1_classify(text)
+            _is_identity_question(text, name)
+
+    def bench_compiled() -> None:
+        for name, text in turns:
+            classifiers[name].classify(text)
+
+    results = {}
+    for label, fn in (("reference", bench_reference), ("compiled", bench_compiled)):
+        fn()  # warm-up
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            fn()
+        elapsed = time.perf_counter() - start
+        results[label] = elapsed / (args.repeat * len(turns)) * 1e6
+
+    print(f"[bench] {len(turns)} agent turns × {args.repeat} passes")
+    print(f"[bench] reference: {results['reference']:.2f} µs/utterance")
+    print(f"[bench] compiled:  {results['compiled']:.2f} µs/utterance")
+    print(f"[bench] speedup:   {results['reference'] / results['compiled']:.1f}x")
+    print(f"[bench] label mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
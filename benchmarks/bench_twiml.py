@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: twilio object-tree TwiML vs the precompiled templates.
+
+Renders every patient and agent turn in transcripts/*.json (plus edge cases
+needing XML escaping) through both builders, fails if any response differs
+by a single byte, and prints the per-response cost of each.
+
+Usage:
+  python -m benchmarks.bench_twiml [--repeat 200]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from typing import Callable
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from bot import twiml_builder as tb  # noqa: E402
+
+EDGE_CASES = [
+    "",
+    "Tom & Jerry's <clinic> \"quoted\" > 5 < 6",
+    "&amp; already escaped",
+    "Line one\nline two\ttabbed\r",
+    "Ünïcödé — café, 日本語, emoji 🙂",
+    "]]> <![CDATA[ <!-- -->",
+    "\ue000 slot character",
+]
+
+
+def load_utterances() -> list[str]:
+    """Every turn in the archive, patient and agent alike."""
+    texts = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "transcripts", "*.json"))):
+        with open(path) as f:
+            data = json.load(f)
+        texts.extend(turn["text"] for turn in data.get("transcript", []))
+    return texts
+
+
+def cases(texts: list[str]) -> list[tuple[str, Callable, Callable, tuple]]:
+    """(name, fast builder, reference builder, args) for every response shape."""
+    out = [("listen", tb.build_listen_response, tb._tree_listen_response, ())]
+    for text in texts:
+        out += [
+            ("gather", tb.build_gather_response, tb._tree_gather_response, (text,)),
+            ("gather", tb.build_gather_response, tb._tree_gather_response, (text, "/gather_deferred")),
+            ("hangup", tb.build_hangup_response, tb._tree_hangup_response, (text,)),
+            ("filler", tb.build_filler_response, tb._tree_filler_response, (text, "/gather_deferred")),
+        ]
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the corpus per timing")
+    args = parser.parse_args()
+
+    texts = load_utterances() + EDGE_CASES
+    responses = cases(texts)
+
+    # ── Equivalence ──────────────────────────────────────────────────────────
+    mismatches = 0
+    for name, fast, reference, call_args in responses:
+        expected, actual = reference(*call_args), fast(*call_args)
+        if expected != actual:
+            mismatches += 1
+            print(f"[bench] MISMATCH {name}{call_args!r}:\n  twilio:   {expected}\n  template: {actual}")
+
+    # ── Timing ───────────────────────────────────────────────────────────────
+    results = {}
+    for label, index in (("twilio", 2), ("template", 1)):
+        def run() -> None:
+            for case in responses:
+                case[index](*case[3])
+
+        run()  # warm-up
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            run()
+        elapsed = time.perf_counter() - start
+        results[label] = elapsed / (args.repeat * len(responses)) * 1e6
+
+    print(f"[bench] {len(texts)} utterances, {len(responses)} responses × {args.repeat} passes")
+    print(f"[bench] twilio:   {results['twilio']:.2f} µs/response")
+    print(f"[bench] template: {results['template']:.2f} µs/response")
+    print(f"[bench] speedup:  {results['twilio'] / results['template']:.1f}x")
+    print(f"[bench] byte mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Webhook load generator: N concurrent synthetic calls against the real server.
+
+Starts the webhook app (Flask or the async variant) and the OpenAI stub in
+this process, creates sessions through ConversationManager, then replays
+Twilio's form posts for each call — /voice, one /gather per agent turn of a
+recorded transcript (following /gather_deferred redirects after fillers),
+the odd /gather_timeout, and a final /status — and reports requests/sec
+plus p50/p99 latency per route.
+
+Transcripts, caches and analysis output from the run go to a scratch
+directory, not the repo.
+
+Usage:
+  python -m benchmarks.loadgen --calls 200 --concurrency 50
+  python -m benchmarks.loadgen --server async --median-ms 800 --tail-prob 0.05 --tail-ms 4000
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from benchmarks.openai_stub import LatencyModel, serve as serve_openai  # noqa: E402
+
+_REDIRECT_RE = re.compile(r"<Redirect[^>]*>([^<]+)</Redirect>")
+
+
+def load_scripts() -> list[dict]:
+    """Recorded calls: scenario id, patient name and the agent's turns."""
+    scripts = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "transcripts", "*.json"))):
+        with open(path) as f:
+            data = json.load(f)
+        turns = [t["text"] for t in data.get("transcript", []) if t["role"] == "agent"]
+        if turns:
+            scripts.append({
+                "scenario_id": data.get("scenario_id"),
+                "patient_name": data.get("patient_name") or "Test Patient",
+                "agent_turns": turns,
+            })
+    return scripts
+
+
+class Recorder:
+    """Per-route request latencies."""
+
+    def __init__(self) -> None:
+        self._samples: dict[str, list[float]] = defaultdict(list)
+        self._errors: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, route: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._samples[route].append(seconds)
+            if not ok:
+                self._errors[route] += 1
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(len(values) for values in self._samples.values())
+
+    def report(self, elapsed: float) -> list[str]:
+        with self._lock:
+            samples = {route: sorted(values) for route, values in self._samples.items()}
+            errors = dict(self._errors)
+        total = sum(len(v) for v in samples.values())
+        everything = sorted(x for values in samples.values() for x in values)
+        lines = [f"{'route':<18}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for route, values in sorted(samples.items()) + [("all", everything)]:
+            errs = errors.get(route, 0) if route != "all" else sum(errors.values())
+            lines.append(
+                f"{route:<18}{len(values):>9}{errs:>8}"
+                f"{_pct(values, 50) * 1000:>10.1f}{_pct(values, 99) * 1000:>10.1f}{values[-1] * 1000:>10.1f}"
+            )
+        lines.append(f"{total} requests in {elapsed:.1f}s → {total / elapsed:.1f} req/s")
+        return lines
+
+
+def _pct(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_call(base_url: str, script: dict, recorder: Recorder, args) -> None:
+    """One synthetic call, start to hangup."""
+    import requests
+    from bot.conversation_manager import manager
+    from scenarios.patient_scenarios import ALL_SCENARIOS
+
+    scenario = next((s for s in ALL_SCENARIOS if s.id == script["scenario_id"]), ALL_SCENARIOS[0])
+    patient = {"full_name": script["patient_name"], "dob": "2000-01-01", "phone": ""}
+    call_sid = f"CALOAD{uuid.uuid4().hex[:28]}"
+    manager.create_session(call_sid, scenario, patient)
+
+    http = requests.Session()
+
+    def post(route: str, **form) -> str:
+        start = time.perf_counter()
+        try:
+            response = http.post(f"{base_url}{route}", data={"CallSid": call_sid, **form}, timeout=30)
+            ok = response.status_code < 400
+            body = response.text
+        except requests.RequestException:
+            ok, body = False, ""
+        recorder.add(route, time.perf_counter() - start, ok)
+        return body
+
+    post("/voice", CallStatus="in-progress")
+    for text in script["agent_turns"]:
+        if args.think_ms:
+            time.sleep(args.think_ms / 1000)
+        if random.random() < args.timeout_prob:
+            post("/gather_timeout")
+        twiml = post("/gather", SpeechResult=text, Confidence="0.92")
+        redirect = _REDIRECT_RE.search(twiml)
+        if redirect and redirect.group(1) == "/gather_deferred":
+            twiml = post("/gather_deferred")
+        if "<Hangup" in twiml:
+            break
+    post("/status", CallStatus="completed", CallDuration="60")
+
+
+def start_server(kind: str, port: int):
+    if kind == "async":
+        import uvicorn
+        from bot.async_webhook_server import app
+
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+        return server
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from bot.webhook_server import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs) -> None:
+            pass
+
+    server = make_server("127.0.0.1", port, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay Twilio webhooks for N concurrent synthetic calls")
+    parser.add_argument("--calls", type=int, default=100, help="synthetic calls in total")
+    parser.add_argument("--concurrency", type=int, default=20, help="calls in flight at once")
+    parser.add_argument("--server", choices=["flask", "async"], default="flask")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--median-ms", type=float, default=600, help="stub LLM median latency")
+    parser.add_argument("--sigma", type=float, default=0.4)
+    parser.add_argument("--tail-prob", type=float, default=0.0)
+    parser.add_argument("--tail-ms", type=float, default=3000)
+    parser.add_argument("--think-ms", type=float, default=0, help="pause before each agent turn")
+    parser.add_argument("--timeout-prob", type=float, default=0.05, help="chance of a /gather_timeout per turn")
+    parser.add_argument("--workdir", default=None, help="where transcripts/caches go (default: a temp dir)")
+    parser.add_argument("--verbose", action="store_true", help="show server output")
+    args = parser.parse_args()
+
+    scripts = load_scripts()
+    if not scripts:
+        print("[load] No recorded transcripts in transcripts/ — nothing to replay.")
+        return 1
+
+    stub = serve_openai(0, LatencyModel(args.median_ms, args.sigma, args.tail_prob, args.tail_ms), background=True)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{stub.server_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="loadgen-")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    recorder = Recorder()
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+
+    with quiet:
+        start_server(args.server, args.port)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = [
+                pool.submit(run_call, base_url, scripts[n % len(scripts)], recorder, args)
+                for n in range(args.calls)
+            ]
+        elapsed = time.perf_counter() - start
+
+        # Post-call transcripts and analyses print as they finish; let them land while quiet
+        from analysis.bug_analyzer import wait_for_pending
+        from analysis.transcript_store import flush_transcripts
+        flush_transcripts(30)
+        wait_for_pending(60)
+
+    failures = [f.exception() for f in futures if f.exception() is not None]
+
+    print(f"[load] {args.calls} calls, {args.concurrency} concurrent, {args.server} server, "
+          f"stub LLM median {args.median_ms:.0f}ms (tail {args.tail_prob:.0%} @ {args.tail_ms:.0f}ms)")
+    if recorder.total():
+        for line in recorder.report(elapsed):
+            print(f"[load] {line}")
+    for error in failures[:5]:
+        print(f"[load] Call failed: {type(error).__name__}: {error}")
+    if failures:
+        print(f"[load] {len(failures)} of {args.calls} call(s) failed")
+    print(f"[load] Scratch output → {workdir}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stub for /v1/chat/completions.
+
+Replies with canned text after a latency drawn from a log-normal
+distribution, with an optional slow tail, so hedging, streaming and
+load tests can run without an API key.  Supports stream=true (SSE).
+
+Usage:
+  python -m benchmarks.openai_stub --port 8001 --median-ms 600 --sigma 0.4 \\
+      --tail-prob 0.05 --tail-ms 3000
+  OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=stub python run.py
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLIES = ["Okay.", "Got it.", "Tuesday morning works for me.", "No, that's all. Thank you."]
+
+
+class LatencyModel:
+    """Log-normal latency (median, sigma) with an optional fixed slow tail."""
+
+    def __init__(self, median_ms: float = 600, sigma: float = 0.4, tail_prob: float = 0.0, tail_ms: float = 0.0) -> None:
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.tail_prob = tail_prob
+        self.tail_ms = tail_ms
+
+    def sample(self) -> float:
+        """Latency in seconds."""
+        if self.tail_prob and random.random() < self.tail_prob:
+            return self.tail_ms / 1000
+        return random.lognormvariate(math.log(max(self.median_ms, 0.001)), self.sigma) / 1000
+
+
+def make_handler(latency: LatencyModel, replies: list[str], model_latency: dict[str, LatencyModel]):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = body.get("model", "stub")
+            delay = model_latency.get(model, latency).sample()
+            reply = random.choice(replies)
+            if (body.get("response_format") or {}).get("type") == "json_object":
+                reply = '{"issues": []}'   # bug_analyzer asks for JSON
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+            if body.get("stream"):
+                self._stream(completion_id, model, reply, delay)
+                return
+
+            time.sleep(delay)
+            self._json({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+        def _stream(self, completion_id: str, model: str, reply: str, delay: float) -> None:
+            words = reply.split(" ")
+            # Time to first token ≈ 70% of the total, the rest spread over the tokens
+            per_token = delay * 0.3 / max(len(words), 1)
+            time.sleep(delay * 0.7)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, word in enumerate(words):
+                self._chunk(completion_id, model, {"content": word if i == 0 else " " + word}, None)
+                time.sleep(per_token)
+            self._chunk(completion_id, model, {}, "stop")
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+
+        def _chunk(self, completion_id: str, model: str, delta: dict, finish_reason) -> None:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+        def _write_chunk(self, data: bytes) -> None:
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def _json(self, payload: dict) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def serve(
+    port: int = 8001,
+    latency: LatencyModel | None = None,
+    replies: list[str] | None = None,
+    model_latency: dict[str, LatencyModel] | None = None,
+    background: bool = False,
+) -> ThreadingHTTPServer:
+    """Start the stub.  With background=True it runs on a daemon thread and the server is returned."""
+    handler = make_handler(latency or LatencyModel(), replies or DEFAULT_REPLIES, model_latency or {})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        print(f"[stub] OpenAI stub on http://127.0.0.1:{server.server_port}/v1")
+        server.serve_forever()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions stub")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--median-ms", type=float, default=600)
+    parser.add_argument("--sigma", type=float, default=0.4)
+    parser.add_argument("--tail-prob", type=float, default=0.0, help="probability of a slow-tail response")
+    parser.add_argument("--tail-ms", type=float, default=3000)
+    parser.add_argument("--model-median", action="append", default=[], metavar="MODEL=MS",
+                        help="per-model median latency, e.g. gpt-4o=900")
+    parser.add_argument("--reply", action="append", help="canned reply (repeatable)")
+    args = parser.parse_args()
+
+    model_latency = {}
+    for item in args.model_median:
+        model, ms = item.split("=", 1)
+        model_latency[model] = LatencyModel(float(ms), args.sigma, args.tail_prob, args.tail_ms)
+
+    serve(
+        args.port,
+        LatencyModel(args.median_ms, args.sigma, args.tail_prob, args.tail_ms),
+        args.reply,
+        model_latency,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the bot and analysis hot paths, with a regression gate.
+
+Times the tier-1 classifiers, system prompt and message assembly, every
+TwiML builder, ConversationManager.add_turn / get_session_info under
+multi-thread contention, save_transcript and _write_report on 10k synthetic
+issues — all driven by the recorded calls in transcripts/*.json.
+
+Results (µs per operation: best and median of --repeat runs, plus their
+relative spread) are written as JSON.  With a baseline present, a benchmark
+fails the run (exit 1) when its best time is more than --threshold slower,
+plus an allowance of NOISE_FACTOR × the larger of the two runs' spreads.
+That allowance is capped at the threshold itself, so noise can at most
+double the allowed slowdown; instead, a flagged benchmark is measured again
+(CONFIRM_RUNS times) and only fails if it stays slow.  Only results taken
+with the same repeat count, Python and machine as the baseline are gated;
+anything else is reported for information.
+
+Timings are machine-specific, so no baseline is committed: CI
+(.github/workflows/bench.yml) records one on the PR's base commit and then
+checks the head on the same runner —
+
+  git checkout $BASE && python -m benchmarks.suite --update-baseline
+  git checkout $HEAD && python -m benchmarks.suite
+
+Usage:
+  python -m benchmarks.suite                      # run, compare, exit 1 on regression
+  python -m benchmarks.suite --quick -k twiml     # fewer runs, only matching benchmarks (not gated)
+  python -m benchmarks.suite --update-baseline    # record the current numbers as the baseline
+"""
+import argparse
+import atexit
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+
+# Saved transcripts must not land in the search index
+os.environ.setdefault("TRANSCRIPT_INDEX", "0")
+
+from analysis import bug_analyzer  # noqa: E402
+from analysis.transcript_store import save_transcript  # noqa: E402
+from bot import twiml_builder as tb  # noqa: E402
+from bot.conversation_manager import ConversationManager  # noqa: E402
+from bot.llm_patient import (  # noqa: E402
+    _build_messages,
+    _build_system_prompt,
+    _is_identity_question,
+    _session_messages,
+    _tier1_classify,
+    get_classifier,
+)
+from bot.session_store import ShardedMemoryStore  # noqa: E402
+from scenarios.patient_scenarios import ALL_SCENARIOS  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "cache", "bench_baseline.json")
+DEFAULT_OUTPUT = os.path.join(ROOT, "cache", "bench_results.json")
+
+# save_transcript and _write_report output; removed on exit
+SCRATCH_DIR = tempfile.mkdtemp(prefix="bench-suite-")
+atexit.register(shutil.rmtree, SCRATCH_DIR, ignore_errors=True)
+
+CONTENTION_THREADS = 8
+CONTENTION_SESSIONS = 32
+SYNTHETIC_ISSUES = 10_000
+
+# Shortest timed sample; quicker benchmarks are looped until they take this long
+MIN_SAMPLE_SECONDS = 0.05
+
+# Extra slowdown allowed per unit of measured spread (relative stdev of the runs),
+# never more than the threshold itself
+NOISE_FACTOR = 3.0
+
+# Times a flagged benchmark is measured again before it counts as a regression
+CONFIRM_RUNS = 2
+
+# A benchmark returns (run, ops): run() does ops operations and is timed as a whole
+Benchmark = Callable[[], tuple[Callable[[], None], int]]
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str):
+    def register(fn: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+# ── Corpus ────────────────────────────────────────────────────────────────────
+
+def load_calls() -> list[dict]:
+    """Recorded calls with their scenario and a patient dict, as the bot would have them."""
+    scenarios = {s.id: s for s in ALL_SCENARIOS}
+    calls = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "transcripts", "*.json"))):
+        with open(path) as f:
+            data = json.load(f)
+        if not data.get("transcript") or data.get("scenario_id") not in scenarios:
+            continue
+        data["scenario"] = scenarios[data["scenario_id"]]
+        data["patient"] = {"full_name": data.get("patient_name") or "", "dob": "1985-03-14", "phone": ""}
+        calls.append(data)
+    return calls
+
+
+CALLS = load_calls()
+AGENT_TURNS = [(c["patient"]["full_name"], t["text"]) for c in CALLS for t in c["transcript"] if t["role"] == "agent"]
+PATIENT_TURNS = [t["text"] for c in CALLS for t in c["transcript"] if t["role"] == "patient"]
+
+
+# ── Patient LLM ───────────────────────────────────────────────────────────────
+
+@benchmark("tier1_classify")
+def bench_tier1_classify():
+    def run() -> None:
+        for _, text in AGENT_TURNS:
+            _tier1_classify(text)
+    return run, len(AGENT_TURNS)
+
+
+@benchmark("is_identity_question")
+def bench_is_identity_question():
+    def run() -> None:
+        for name, text in AGENT_TURNS:
+            _is_identity_question(text, name)
+    return run, len(AGENT_TURNS)
+
+
+@benchmark("tier1_classifier_compiled")
+def bench_tier1_classifier_compiled():
+    classifiers = {name: get_classifier(name) for name, _ in AGENT_TURNS}
+
+    def run() -> None:
+        for name, text in AGENT_TURNS:
+            classifiers[name].classify(text)
+    return run, len(AGENT_TURNS)
+
+
+@benchmark("build_system_prompt")
+def bench_build_system_prompt():
+    def run() -> None:
+        for call in CALLS:
+            _build_system_prompt(call["scenario"], call["patient"], False)
+            _build_system_prompt(call["scenario"], call["patient"], True)
+    return run, 2 * len(CALLS)
+
+
+@benchmark("build_messages")
+def bench_build_messages():
+    """Full rebuild from history at every agent turn of every call."""
+    cases = []
+    for call in CALLS:
+        history = call["transcript"]
+        for i, turn in enumerate(history):
+            if turn["role"] == "agent":
+                spoken = any(t["role"] == "patient" for t in history[:i])
+                cases.append((call["scenario"], call["patient"], spoken, history[:i], turn["text"]))
+
+    def run() -> None:
+        for scenario, patient, spoken, history, text in cases:
+            _build_messages(scenario, patient, spoken, history, text)
+    return run, len(cases)
+
+
+@benchmark("session_messages")
+def bench_session_messages():
+    """The webhook path: cached system prompt plus the append-only buffer."""
+    cases = []
+    for call in CALLS:
+        session = {"system_prompts": {}, "messages": []}
+        spoken = False
+        for turn in call["transcript"]:
+            if turn["role"] == "agent":
+                session["messages"].append({"role": "user", "content": turn["text"]})
+                cases.append((session, call["scenario"], call["patient"], spoken, turn["text"], len(session["messages"])))
+            else:
+                spoken = True
+                session["messages"].append({"role": "assistant", "content": turn["text"]})
+
+    def run() -> None:
+        for session, scenario, patient, spoken, text, upto in cases:
+            _session_messages({**session, "messages": session["messages"][:upto]}, scenario, patient, spoken, text)
+    return run, len(cases)
+
+
+# ── TwiML ─────────────────────────────────────────────────────────────────────
+
+@benchmark("twiml_listen")
+def bench_twiml_listen():
+    def run() -> None:
+        for _ in PATIENT_TURNS:
+            tb.build_listen_response()
+    return run, len(PATIENT_TURNS)
+
+
+def _twiml_benchmark(build: Callable[[str], str]) -> tuple[Callable[[], None], int]:
+    def run() -> None:
+        for text in PATIENT_TURNS:
+            build(text)
+    return run, len(PATIENT_TURNS)
+
+
+@benchmark("twiml_gather")
+def bench_twiml_gather():
+    return _twiml_benchmark(tb.build_gather_response)
+
+
+@benchmark("twiml_hangup")
+def bench_twiml_hangup():
+    return _twiml_benchmark(tb.build_hangup_response)
+
+
+@benchmark("twiml_retry")
+def bench_twiml_retry():
+    return _twiml_benchmark(tb.build_retry_response)
+
+
+@benchmark("twiml_filler")
+def bench_twiml_filler():
+    return _twiml_benchmark(lambda text: tb.build_filler_response(text, "/gather_deferred"))
+
+
+# ── Conversation state ────────────────────────────────────────────────────────
+
+def _contended(op: Callable[[ConversationManager, str, str, str], object]) -> tuple[Callable[[], None], int]:
+    """CONTENTION_THREADS threads replaying every call's turns against CONTENTION_SESSIONS shared sessions."""
+    turns = [(t["role"], t["text"]) for c in CALLS for t in c["transcript"]]
+    call_sids = [f"CABENCH{i:04d}" for i in range(CONTENTION_SESSIONS)]
+    per_thread = [
+        [(call_sids[random.Random(n * 7919 + i).randrange(CONTENTION_SESSIONS)], role, text)
+         for i, (role, text) in enumerate(turns)]
+        for n in range(CONTENTION_THREADS)
+    ]
+
+    def run() -> None:
+        # Fresh sessions each run so histories don't grow across repeats
+        manager = ConversationManager(ShardedMemoryStore())
+        for i, sid in enumerate(call_sids):
+            call = CALLS[i % len(CALLS)]
+            manager.create_session(sid, call["scenario"], call["patient"])
+        start = threading.Barrier(CONTENTION_THREADS)
+
+        def worker(ops: list[tuple[str, str, str]]) -> None:
+            start.wait()
+            for sid, role, text in ops:
+                op(manager, sid, role, text)
+
+        threads = [threading.Thread(target=worker, args=(ops,)) for ops in per_thread]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    return run, CONTENTION_THREADS * len(turns)
+
+
+@benchmark("add_turn_contended")
+def bench_add_turn_contended():
+    return _contended(lambda manager, sid, role, text: manager.add_turn(sid, role, text))
+
+
+@benchmark("get_session_info_contended")
+def bench_get_session_info_contended():
+    return _contended(lambda manager, sid, role, text: manager.get_session_info(sid))
+
+
+# ── Analysis ──────────────────────────────────────────────────────────────────
+
+@benchmark("save_transcript")
+def bench_save_transcript():
+    out_dir = os.path.join(SCRATCH_DIR, "transcripts")
+
+    def run() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i, call in enumerate(CALLS):
+                info = {k: call.get(k) for k in ("scenario_id", "scenario_name", "patient_name", "elapsed_seconds", "turn_count")}
+                save_transcript(call["call_sid"], info, call["transcript"], out_dir, f"_{i}")
+    return run, len(CALLS)
+
+
+@benchmark("write_report_10k")
+def bench_write_report_10k():
+    rng = random.Random(25)
+    agent_quotes = [text for _, text in AGENT_TURNS]
+    issues = [
+        {
+            "transcript_id": rng.choice(CALLS)["scenario_id"],
+            "type": rng.choice(["Hallucination", "Scheduling", "Identity", "Flow", "Tone"]),
+            "severity": rng.choice(["Critical", "High", "Medium", "Low"]),
+            "turn_number": rng.randrange(1, 40),
+            "description": f"Synthetic issue {n}",
+            "agent_quote": rng.choice(agent_quotes),
+            "expected_behavior": "The agent should have answered the patient's actual question.",
+        }
+        for n in range(SYNTHETIC_ISSUES)
+    ]
+
+    def run() -> None:
+        saved = bug_analyzer.BUG_REPORT_PATH
+        bug_analyzer.BUG_REPORT_PATH = os.path.join(SCRATCH_DIR, "bug_report.md")
+        try:
+            bug_analyzer._write_report(issues, len(CALLS))
+        finally:
+            bug_analyzer.BUG_REPORT_PATH = saved
+    return run, 1
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+def measure(bench: Benchmark, repeat: int) -> dict:
+    run, ops = bench()
+    run()  # warm-up
+
+    # Like timeit's autorange: loop fast benchmarks so each timed sample is long enough to be stable
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        if time.perf_counter() - start >= MIN_SAMPLE_SECONDS:
+            break
+        loops *= 2
+
+    per_op = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        per_op.append((time.perf_counter() - start) / (loops * ops) * 1e6)
+    median = statistics.median(per_op)
+    return {
+        "ops": ops * loops,
+        "best_us": round(min(per_op), 4),
+        "median_us": round(median, 4),
+        "spread": round(statistics.stdev(per_op) / median, 4) if len(per_op) > 1 else 0.0,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Names of benchmarks whose best time regressed by more than threshold plus the (capped) noise allowance."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            print(f"[bench] {name:<28} (no baseline)")
+            continue
+        change = result["best_us"] / base["best_us"] - 1
+        noise = NOISE_FACTOR * max(base.get("spread", 0.0), result["spread"])
+        allowed = threshold + min(noise, threshold)
+        flag = "REGRESSION" if change > allowed else ""
+        print(
+            f"[bench] {name:<28} {base['best_us']:>12.2f} → {result['best_us']:>12.2f} µs/op  "
+            f"{change:+7.1%} (allowed +{allowed:.0%})  {flag}"
+        )
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the bot and analysis hot paths")
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per benchmark")
+    parser.add_argument("--quick", action="store_true", help="3 timed runs per benchmark")
+    parser.add_argument("-k", dest="only", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to --baseline too")
+    args = parser.parse_args()
+
+    if not CALLS:
+        print("[bench] No recorded transcripts in transcripts/ — nothing to do.")
+        return 1
+
+    repeat = 3 if args.quick else args.repeat
+    selected = {name: bench for name, bench in BENCHMARKS.items() if args.only in name}
+    print(f"[bench] {len(CALLS)} calls, {len(AGENT_TURNS)} agent / {len(PATIENT_TURNS)} patient turns, {repeat} runs each")
+
+    results = {}
+    for name, bench in selected.items():
+        results[name] = measure(bench, repeat)
+        print(f"[bench] {name:<28} {results[name]['best_us']:>12.2f} µs/op (median {results[name]['median_us']:.2f}, {results[name]['ops']} ops)")
+
+    report = {
+        "generated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "repeat": repeat,
+        "benchmarks": results,
+    }
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[bench] Results → {args.output}")
+
+    if args.update_baseline:
+        if os.path.exists(args.baseline) and selected != BENCHMARKS:
+            # Keep the baseline for benchmarks that weren't run
+            with open(args.baseline) as f:
+                report["benchmarks"] = {**json.load(f)["benchmarks"], **results}
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[bench] Baseline updated → {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"[bench] No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print(f"[bench] Comparing with baseline from {baseline.get('generated', '?')} "
+          f"({baseline.get('machine', '?')}, Python {baseline.get('python', '?')}, {baseline.get('repeat', '?')} runs), "
+          f"threshold {args.threshold:.0%}")
+    regressions = compare(results, baseline, args.threshold)
+    mismatched = [key for key in ("repeat", "python", "machine") if baseline.get(key) != report[key]]
+    if mismatched:
+        print(f"[bench] Not gated: the baseline was recorded with a different {' / '.join(mismatched)}.")
+        return 0
+
+    # A one-off stall shouldn't fail the run: a regression has to show up again
+    for _ in range(CONFIRM_RUNS):
+        if not regressions:
+            break
+        print(f"[bench] Re-measuring {len(regressions)} flagged benchmark(s)")
+        for name in regressions:
+            again = measure(BENCHMARKS[name], repeat)
+            if again["best_us"] < results[name]["best_us"]:
+                results[name] = again
+        regressions = compare({name: results[name] for name in regressions}, baseline, args.threshold)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if regressions:
+        print(f"[bench] {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("[bench] No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Local fake of the Twilio REST endpoints the bot uses.
+
+Handles Calls.create and the IncomingPhoneNumbers list/update made by
+ngrok_manager, answering after a latency drawn from LatencyModel.  No calls
+are actually placed and no webhooks are sent back.
+
+Usage:
+  python -m benchmarks.twilio_stub --port 8002 --median-ms 250
+  TWILIO_API_BASE_URL=http://127.0.0.1:8002 python run.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.openai_stub import LatencyModel
+
+_CALLS_RE = re.compile(r"^/2010-04-01/Accounts/(?P<account>[^/]+)/Calls\.json$")
+_NUMBERS_RE = re.compile(r"^/2010-04-01/Accounts/(?P<account>[^/]+)/IncomingPhoneNumbers(?:/(?P<sid>[^/]+))?\.json$")
+
+
+def make_handler(latency: LatencyModel, counters: dict):
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+            path = urlparse(self.path).path
+            time.sleep(latency.sample())
+
+            if match := _CALLS_RE.match(path):
+                with lock:
+                    counters["calls"] += 1
+                self._json(201, {
+                    "sid": f"CA{uuid.uuid4().hex}",
+                    "account_sid": match["account"],
+                    "to": form.get("To"),
+                    "from": form.get("From"),
+                    "status": "queued",
+                    "direction": "outbound-api",
+                    "uri": f"{path[:-5]}/{uuid.uuid4().hex}.json",
+                })
+            elif (match := _NUMBERS_RE.match(path)) and match["sid"]:
+                self._json(200, _number(match["account"], match["sid"], form.get("VoiceUrl")))
+            else:
+                self._json(404, {"code": 20404, "message": "Not found", "status": 404})
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            match = _NUMBERS_RE.match(url.path)
+            if not match or match["sid"]:
+                self._json(404, {"code": 20404, "message": "Not found", "status": 404})
+                return
+            time.sleep(latency.sample())
+            phone_number = parse_qs(url.query).get("PhoneNumber", ["+15550000000"])[0]
+            self._json(200, {
+                "incoming_phone_numbers": [_number(match["account"], "PN" + "0" * 32, None, phone_number)],
+                "next_page_uri": None,
+                "page": 0,
+                "page_size": 50,
+                "uri": url.path,
+            })
+
+        def _json(self, status: int, payload: dict) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def _number(account: str, sid: str, voice_url, phone_number: str = "+15550000000") -> dict:
+    return {"sid": sid, "account_sid": account, "phone_number": phone_number, "voice_url": voice_url}
+
+
+def serve(port: int = 8002, latency: LatencyModel | None = None, background: bool = False) -> ThreadingHTTPServer:
+    """Start the fake.  With background=True it runs on a daemon thread; server.counters counts placed calls."""
+    counters = {"calls": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency or LatencyModel(250, 0.3), counters))
+    server.daemon_threads = True
+    server.counters = counters
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        print(f"[stub] Twilio stub on http://127.0.0.1:{server.server_port}")
+        server.serve_forever()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local fake of the Twilio REST API")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--median-ms", type=float, default=250)
+    parser.add_argument("--sigma", type=float, default=0.3)
+    args = parser.parse_args()
+    serve(args.port, LatencyModel(args.median_ms, args.sigma))
+
+
+if __name__ == "__main__":
+    main()
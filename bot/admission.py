@@ -0,0 +1,216 @@
+"""
+Admission control for OpenAI requests.
+
+Every chat completion — live patient turns and background bug analysis —
+takes a slot from the shared AdmissionController first.  Requests wait in a
+priority queue (live before background, FIFO within a priority) for both a
+free concurrency slot and a token from a token-bucket rate limiter, so a
+burst of calls queues briefly instead of turning into a burst of 429s.
+
+Live turns preempt background work: they always go first in the queue, and
+LLM_LIVE_RESERVE slots are kept free of background requests so a long bug
+analysis never holds the last slot a turn needs.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from bot import metrics
+from bot.hedging import LatencyHistogram
+
+LIVE = 0
+BACKGROUND = 1
+_PRIORITY_NAMES = {LIVE: "live", BACKGROUND: "background"}
+
+
+class AdmissionTimeout(TimeoutError):
+    """No slot became available within the caller's timeout."""
+
+
+class TokenBucket:
+    """rate tokens per second, up to burst banked.  rate <= 0 means unlimited."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def try_take(self) -> float:
+        """Take a token if one is available. Returns 0.0 on success, else seconds until the next one."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int = 8, rate: float = 0.0, burst: int = 8, live_reserve: int = 2) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self.background_limit = max(1, self.max_concurrent - live_reserve)
+        self._bucket = TokenBucket(rate, burst)
+        self._cond = threading.Condition()
+        self._queue: list[tuple[int, int]] = []   # (priority, ticket) heap
+        self._seq = itertools.count()
+        self._in_flight = {LIVE: 0, BACKGROUND: 0}
+        self._background_paused_until = 0.0
+        self._waits = {p: LatencyHistogram() for p in _PRIORITY_NAMES}
+        self._stats = {"admitted": 0, "timeouts": 0}
+
+    # ── Acquire / release ─────────────────────────────────────────────────────
+
+    def acquire(self, priority: int = LIVE, timeout: Optional[float] = None) -> None:
+        """Block until admitted. Raises AdmissionTimeout if that takes longer than timeout."""
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        entry = (priority, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    retry_in = self._try_admit(entry)
+                    if retry_in == 0.0:
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise AdmissionTimeout(f"no LLM slot within {timeout}s")
+                    # Woken early by release(); otherwise re-check when a token is due
+                    self._cond.wait(min(x for x in (retry_in, remaining) if x is not None))
+            except BaseException:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+                raise
+
+        waited = time.monotonic() - start
+        self._waits[priority].add(waited)
+        metrics.admission_wait_seconds.observe(waited, _PRIORITY_NAMES[priority])
+
+    def release(self, priority: int = LIVE) -> None:
+        with self._cond:
+            self._in_flight[priority] -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: int = LIVE, timeout: Optional[float] = None) -> Iterator[None]:
+        self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    async def acquire_async(self, priority: int = LIVE, timeout: Optional[float] = None) -> None:
+        """acquire() for the async server; only requests that have to queue occupy a thread."""
+        if self._try_acquire_now(priority):
+            return
+        waiter = asyncio.ensure_future(asyncio.to_thread(self.acquire, priority, timeout))
+        try:
+            await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # The thread can't be interrupted; hand back the slot if it still gets one
+            waiter.add_done_callback(
+                lambda f: f.cancelled() or f.exception() is not None or self.release(priority)
+            )
+            raise
+
+    def backoff(self, seconds: float) -> None:
+        """After a 429: hold background requests for seconds so live turns get the remaining quota."""
+        with self._cond:
+            self._background_paused_until = max(self._background_paused_until, time.monotonic() + seconds)
+
+    def _try_acquire_now(self, priority: int) -> bool:
+        """Admit without queueing if nothing of equal or higher priority is waiting.
+
+        Queued background requests (paused, or at background_limit) don't
+        push a live turn onto a thread: the live entry would head the queue anyway.
+        """
+        entry = (priority, next(self._seq))
+        with self._cond:
+            if any(queued <= priority for queued, _ in self._queue):
+                return False
+            heapq.heappush(self._queue, entry)
+            if self._try_admit(entry) == 0.0:
+                admitted = True
+            else:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                admitted = False
+        if admitted:
+            self._waits[priority].add(0.0)
+            metrics.admission_wait_seconds.observe(0.0, _PRIORITY_NAMES[priority])
+        return admitted
+
+    def _try_admit(self, entry: tuple[int, int]) -> float:
+        """Admit entry if it heads the queue and a slot and token are free (caller holds _cond).
+
+        Returns 0.0 once admitted, else how long to wait before checking again
+        (a long wait when only a release() can help).
+        """
+        priority = entry[0]
+        if self._queue[0] != entry:
+            return 1.0
+        if sum(self._in_flight.values()) >= self.max_concurrent:
+            return 1.0
+        if priority == BACKGROUND:
+            if self._in_flight[BACKGROUND] >= self.background_limit:
+                return 1.0
+            paused = self._background_paused_until - time.monotonic()
+            if paused > 0:
+                return paused
+        retry_in = self._bucket.try_take()
+        if retry_in:
+            return retry_in
+        heapq.heappop(self._queue)
+        self._in_flight[priority] += 1
+        self._stats["admitted"] += 1
+        # The next entry may be admissible too
+        self._cond.notify_all()
+        return 0.0
+
+    # ── Introspection ─────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._cond:
+            depth = {name: sum(1 for p, _ in self._queue if p == level) for level, name in _PRIORITY_NAMES.items()}
+            in_flight = {_PRIORITY_NAMES[p]: n for p, n in self._in_flight.items()}
+            stats = dict(self._stats)
+        stats.update(
+            queue_depth=depth,
+            in_flight=in_flight,
+            max_concurrent=self.max_concurrent,
+            wait=({_PRIORITY_NAMES[p]: hist.summary() for p, hist in self._waits.items()}),
+        )
+        return stats
+
+    def metric_lines(self) -> list[str]:
+        stats = self.stats()
+        return (
+            metrics.gauge("llm_admission_queue_depth", "LLM requests waiting for admission.", "priority", stats["queue_depth"])
+            + metrics.gauge("llm_admission_in_flight", "LLM requests currently admitted.", "priority", stats["in_flight"])
+        )
+
+
+def controller_from_env() -> AdmissionController:
+    return AdmissionController(
+        max_concurrent=int(os.getenv("LLM_MAX_CONCURRENT", "8")),
+        rate=float(os.getenv("LLM_RATE_LIMIT_RPS", "0")),
+        burst=int(os.getenv("LLM_RATE_LIMIT_BURST", "8")),
+        live_reserve=int(os.getenv("LLM_LIVE_RESERVE", "2")),
+    )
+
+
+# Global singleton shared by the patient LLM and the bug analyzer
+admission = controller_from_env()
+metrics.register_collector(admission.metric_lines)
@@ -0,0 +1,197 @@
+"""
+Async (ASGI) variant of the webhook server.
+
+Serves the Twilio webhook routes, /api/status, /api/events and /metrics on
+Starlette, with tier-2 replies from agenerate_patient_response on the
+AsyncOpenAI client — an in-flight LLM request is a task, not a thread.
+Transcripts still go to the background writer, so nothing on the event loop
+touches disk.  The dashboard and /simulate routes are the Flask app's,
+mounted underneath and run in a worker thread.
+
+State (sessions, simulation progress, pending replies) is shared with
+bot.webhook_server, so both apps describe the same process.
+
+Run with WEBHOOK_SERVER=async python run.py after
+pip install -r requirements-async.txt.  Session calls run on the event loop,
+so use the in-memory session store — SESSION_STORE=sqlite is for the Flask
+server.
+"""
+import asyncio
+import random
+import time
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from a2wsgi import WSGIMiddleware
+
+import bot.webhook_server as ws
+from bot import metrics
+from bot.conversation_manager import manager
+from bot.llm_patient import LLM_TIMEOUT, agenerate_patient_response
+from bot.twiml_builder import (
+    build_filler_response,
+    build_hangup_response,
+    build_listen_response,
+    build_retry_response,
+)
+
+# How often an idle /api/events stream checks for simulation changes
+SSE_POLL_SECONDS = 0.25
+
+
+def _twiml(xml: str) -> Response:
+    return Response(xml, media_type="text/xml")
+
+
+# ── Twilio webhook routes ─────────────────────────────────────────────────────
+
+async def voice(request: Request) -> Response:
+    """Called the moment our outbound call connects. Athena speaks first — just listen."""
+    form = await request.form()
+    if not manager.get_session(form.get("CallSid", "")):
+        return _twiml(build_hangup_response("I'm sorry, something went wrong. Goodbye."))
+    return _twiml(build_listen_response())
+
+
+async def gather(request: Request) -> Response:
+    started = time.perf_counter()
+    form = await request.form()
+    call_sid = form.get("CallSid", "")
+    speech_result = (form.get("SpeechResult") or "").strip()
+
+    early, session = ws._agent_turn(call_sid, speech_result)
+    if early is not None:
+        return _twiml(early)
+
+    trace: dict = {}
+    task = asyncio.ensure_future(agenerate_patient_response(
+        session["scenario"], session["patient"], session["history"], speech_result,
+        session=session, trace=trace,
+    ))
+
+    if ws.TURN_BUDGET > 0:
+        try:
+            patient_reply, is_complete = await asyncio.wait_for(asyncio.shield(task), ws.TURN_BUDGET)
+        except asyncio.TimeoutError:
+            # Same filler + redirect as the Flask app; the task keeps running
+            filler = random.choice(ws._FILLER_RESPONSES)
+            trace["filler"] = filler
+            with ws._pending_lock:
+                ws._pending_replies[call_sid] = (task, trace, started)
+            return _twiml(build_filler_response(filler, "/gather_deferred"))
+    else:
+        patient_reply, is_complete = await task
+
+    return _twiml(ws._reply_xml(call_sid, patient_reply, is_complete, trace, started))
+
+
+async def gather_deferred(request: Request) -> Response:
+    """Redirect target after a filler: deliver the LLM reply that overran the turn budget."""
+    form = await request.form()
+    call_sid = form.get("CallSid", "")
+
+    with ws._pending_lock:
+        pending = ws._pending_replies.pop(call_sid, None)
+
+    if not manager.get_session(call_sid):
+        return _twiml(build_hangup_response("Goodbye."))
+
+    if pending is None:
+        return _twiml(build_listen_response())
+
+    task, trace, started = pending
+    try:
+        patient_reply, is_complete = await asyncio.wait_for(task, LLM_TIMEOUT + 1)
+    except Exception as e:
+        print(f"[webhook] Deferred reply failed for {call_sid}: {e}")
+        trace["tier"] = "error"
+        patient_reply, is_complete = "Sorry, could you repeat that?", False
+
+    return _twiml(ws._reply_xml(call_sid, patient_reply, is_complete, trace, started))
+
+
+async def gather_timeout(request: Request) -> Response:
+    form = await request.form()
+    call_sid = form.get("CallSid", "")
+
+    if not manager.get_session(call_sid):
+        return _twiml(build_hangup_response("Goodbye."))
+
+    if manager.record_silence(call_sid) >= ws.MAX_EMPTY:
+        ws._finalize(call_sid)
+        return _twiml(build_hangup_response("I'll try calling again later. Goodbye."))
+
+    return _twiml(build_retry_response("Hello? Are you still there?"))
+
+
+async def status(request: Request) -> Response:
+    form = await request.form()
+    call_sid = form.get("CallSid", "")
+    if form.get("CallStatus", "") in ws._TERMINAL_CALL_STATUSES and call_sid:
+        # Only queues the transcript for the background writer
+        ws._finalize(call_sid)
+    return Response(status_code=204)
+
+
+# ── Progress & metrics ────────────────────────────────────────────────────────
+
+async def api_status(request: Request) -> JSONResponse:
+    with ws._sim_lock:
+        state = ws._sim_snapshot()
+    return JSONResponse(state)
+
+
+async def api_events(request: Request) -> StreamingResponse:
+    """Same stream (and "done" rule) as the Flask /api/events, polling the version counter instead of holding a thread."""
+    async def stream():
+        with ws._sim_lock:
+            state, version = ws._sim_snapshot(), ws._sim_version
+        yield ws._sse_event("snapshot", state)
+
+        idle_since = time.monotonic()
+        while not await request.is_disconnected():
+            await asyncio.sleep(SSE_POLL_SECONDS)
+            if ws._sim_version == version:
+                if time.monotonic() - idle_since >= ws.SSE_KEEPALIVE:
+                    if ws._sim_finished(state):
+                        yield ws._sse_event("done", {"status": state["status"]})
+                        return
+                    idle_since = time.monotonic()
+                    yield ": keep-alive\n\n"
+                continue
+            with ws._sim_lock:
+                latest, version = ws._sim_snapshot(), ws._sim_version
+            idle_since = time.monotonic()
+            diff = ws._sim_diff(state, latest)
+            state = latest
+            if diff:
+                yield ws._sse_event("diff", diff)
+            if "status" in diff and ws._sim_finished(state):
+                yield ws._sse_event("done", {"status": state["status"]})
+                return
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def prometheus_metrics(request: Request) -> Response:
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+app = Starlette(routes=[
+    Route("/voice", voice, methods=["POST"]),
+    Route("/gather", gather, methods=["POST"]),
+    Route("/gather_deferred", gather_deferred, methods=["POST"]),
+    Route("/gather_timeout", gather_timeout, methods=["POST"]),
+    Route("/status", status, methods=["POST"]),
+    Route("/api/status", api_status),
+    Route("/api/events", api_events),
+    Route("/metrics", prometheus_metrics),
+    # Dashboard, /simulate and static files
+    Mount("/", app=WSGIMiddleware(ws.app)),
+])
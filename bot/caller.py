@@ -1,20 +1,19 @@
 import os
-from twilio.rest import Client
+from concurrent.futures import Future, ThreadPoolExecutor
+
 from bot.conversation_manager import manager
+from bot.twilio_client import PLACEMENT_WORKERS, get_twilio_client
 from scenarios.patient_scenarios import PatientScenario
 
 TARGET_NUMBER = os.getenv("TARGET_PHONE_NUMBER", "+18054398008")
 FROM_NUMBER = os.getenv("TWILIO_FROM_NUMBER", "")
 
+_placement_pool = ThreadPoolExecutor(max_workers=PLACEMENT_WORKERS, thread_name_prefix="twilio")
+
 
 def place_call(scenario: PatientScenario, webhook_base_url: str, patient: dict) -> str:
     """Place an outbound call for the given scenario. Returns the Twilio CallSid."""
-    twilio_client = Client(
-        os.getenv("TWILIO_ACCOUNT_SID"),
-        os.getenv("TWILIO_AUTH_TOKEN"),
-    )
-
-    call = twilio_client.calls.create(
+    call = get_twilio_client().calls.create(
         to=TARGET_NUMBER,
         from_=FROM_NUMBER,
         url=f"{webhook_base_url}/voice",
@@ -25,3 +24,16 @@ def place_call(scenario: PatientScenario, webhook_base_url: str, patient: dict)
     manager.create_session(call.sid, scenario, patient)
     print(f"[caller] Call placed — SID: {call.sid} | Scenario: {scenario.name}")
     return call.sid
+
+
+def place_calls(scenarios: list[PatientScenario], webhook_base_url: str, patient: dict) -> list[Future]:
+    """
+    Place a batch of calls concurrently without blocking.
+
+    Returns one future per scenario, in order, resolving to its CallSid (or
+    raising whatever place_call raised).
+    """
+    return [
+        _placement_pool.submit(place_call, scenario, webhook_base_url, patient)
+        for scenario in scenarios
+    ]
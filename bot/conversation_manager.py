@@ -1,64 +1,128 @@
+import os
 import threading
+import time
 from datetime import datetime
 from typing import Optional
 
+from bot.session_store import SessionStore, ShardedMemoryStore, store_from_env
+
+# How often waiters re-check a shared (multi-process) store for completed calls
+COMPLETION_POLL_SECONDS = float(os.getenv("SESSION_POLL_SECONDS", "0.5"))
+
 
 class ConversationManager:
-    def __init__(self) -> None:
-        self._sessions: dict[str, dict] = {}
-        self._lock = threading.Lock()
+    def __init__(self, store: Optional[SessionStore] = None) -> None:
+        self._store = store if store is not None else ShardedMemoryStore()
+        # Signalled whenever a session is marked complete in this process;
+        # with a shared store, waiters also poll for other workers' calls.
+        self._completed = threading.Condition()
+        self._poll_interval = COMPLETION_POLL_SECONDS if self._store.shared else None
+
+    @property
+    def store(self) -> SessionStore:
+        return self._store
 
     def create_session(self, call_sid: str, scenario, patient: dict) -> None:
-        with self._lock:
-            self._sessions[call_sid] = {
-                "scenario": scenario,
-                "patient": patient,
-                "history": [],
-                "turn_count": 0,
-                "start_time": datetime.utcnow(),
-                "is_complete": False,
-                "consecutive_empty": 0,
-            }
+        self._store.put(call_sid, {
+            "scenario": scenario,
+            "patient": patient,
+            "history": [],
+            "turn_count": 0,
+            "start_time": datetime.utcnow(),
+            "is_complete": False,
+            "finalizing": False,
+            "persisted": False,
+            "consecutive_empty": 0,
+            "has_spoken": False,
+            "said_reason": False,
+            # Append-only chat messages for the patient LLM (agent → user,
+            # patient → assistant) plus the cached system prompt per has_spoken.
+            "messages": [],
+            "system_prompts": {},
+        })
 
     def get_session(self, call_sid: str) -> Optional[dict]:
-        with self._lock:
-            return self._sessions.get(call_sid)
-
-    def add_turn(self, call_sid: str, role: str, text: str) -> None:
-        with self._lock:
-            session = self._sessions.get(call_sid)
-            if not session:
-                return
-            session["history"].append({"role": role, "text": text})
+        """The session dict — live for the memory store, a snapshot for shared stores (change it via methods)."""
+        return self._store.get(call_sid)
+
+    def add_turn(self, call_sid: str, role: str, text: str, meta: Optional[dict] = None) -> Optional[dict]:
+        """Record a turn. meta (e.g. which tier produced a patient reply) is stored on the turn.
+
+        Returns the updated session (None if there is none).
+        """
+        def apply(session: dict) -> dict:
+            session["history"].append({"role": role, "text": text, **(meta or {})})
             if role == "agent":
                 session["turn_count"] += 1
+                session["messages"].append({"role": "user", "content": text})
+            else:
+                session["has_spoken"] = True
+                session["messages"].append({"role": "assistant", "content": text})
+                if meta and meta.get("opener"):
+                    session["said_reason"] = True
             if text.strip():
                 session["consecutive_empty"] = 0
             else:
                 session["consecutive_empty"] += 1
+            return session
+
+        return self._store.update(call_sid, apply)
+
+    def record_silence(self, call_sid: str) -> int:
+        """Count a Gather that heard nothing. Returns the consecutive count (0 if there is no session)."""
+        def apply(session: dict) -> int:
+            session["consecutive_empty"] += 1
+            return session["consecutive_empty"]
+
+        return self._store.update(call_sid, apply) or 0
+
+    def begin_finalize(self, call_sid: str) -> bool:
+        """Claim the right to finalize this call.
+
+        Returns True for exactly one caller, so concurrent /gather and /status
+        webhooks save the transcript once.  Waiters are only woken by the
+        mark_complete() that follows, once the transcript is on disk.
+        """
+        def apply(session: dict) -> bool:
+            if session["finalizing"] or session["is_complete"]:
+                return False
+            session["finalizing"] = True
+            return True
 
-    def mark_complete(self, call_sid: str) -> None:
-        with self._lock:
-            session = self._sessions.get(call_sid)
-            if session:
-                session["is_complete"] = True
+        return bool(self._store.update(call_sid, apply))
+
+    def mark_complete(self, call_sid: str) -> bool:
+        """Mark the session complete and wake any waiters.
+
+        Returns True only for the caller that actually transitioned the session.
+        """
+        def apply(session: dict) -> bool:
+            if session["is_complete"]:
+                return False
+            session["is_complete"] = True
+            return True
+
+        changed = bool(self._store.update(call_sid, apply))
+        if changed:
+            with self._completed:
+                self._completed.notify_all()
+        return changed
+
+    def mark_persisted(self, call_sid: str) -> None:
+        """The transcript is saved (or there was none), so the session may be evicted once complete."""
+        self._store.update(call_sid, lambda session: session.update(persisted=True))
+        self._store.mark_persisted(call_sid)
 
     def is_complete(self, call_sid: str) -> bool:
-        with self._lock:
-            session = self._sessions.get(call_sid)
-            # If session doesn't exist treat as complete (already cleaned up)
-            return session.get("is_complete", True) if session else True
+        session = self._store.get(call_sid)
+        # If session doesn't exist treat as complete (already cleaned up)
+        return session.get("is_complete", True) if session else True
 
     def get_transcript(self, call_sid: str) -> list[dict]:
-        with self._lock:
-            session = self._sessions.get(call_sid)
-            return list(session["history"]) if session else []
+        return self._store.read(call_sid, lambda session: list(session["history"])) or []
 
     def get_session_info(self, call_sid: str) -> dict:
-        with self._lock:
-            session = self._sessions.get(call_sid)
-            if not session:
-                return {}
+        def info(session: dict) -> dict:
             elapsed = int((datetime.utcnow() - session["start_time"]).total_seconds())
             return {
                 "scenario_id": session["scenario"].id,
@@ -69,13 +133,50 @@ class ConversationManager:
                 "is_complete": session["is_complete"],
             }
 
+        return self._store.read(call_sid, info) or {}
+
     def all_complete(self, call_sids: list[str]) -> bool:
-        with self._lock:
-            return all(
-                self._sessions.get(sid, {}).get("is_complete", True)
-                for sid in call_sids
-            )
+        return all(self.is_complete(sid) for sid in call_sids)
+
+    # ── Completion waiters ────────────────────────────────────────────────────
+
+    def wait_complete(self, call_sid: str, timeout: Optional[float] = None) -> bool:
+        """Block until the session completes. Returns False on timeout."""
+        return self.wait_all([call_sid], timeout)
+
+    def wait_any(self, call_sids: list[str], timeout: Optional[float] = None) -> list[str]:
+        """Block until at least one of call_sids is complete (or timeout).
+
+        Returns the subset of call_sids that are complete — empty on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._completed:
+            while True:
+                done = [sid for sid in call_sids if self.is_complete(sid)]
+                if done or not call_sids:
+                    return done
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return []
+                self._completed.wait(self._wait_slice(remaining))
+
+    def wait_all(self, call_sids: list[str], timeout: Optional[float] = None) -> bool:
+        """Block until every one of call_sids is complete. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._completed:
+            while not all(self.is_complete(sid) for sid in call_sids):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._completed.wait(self._wait_slice(remaining))
+            return True
+
+    def _wait_slice(self, remaining: Optional[float]) -> Optional[float]:
+        """How long to sleep on _completed: until the deadline, or one poll for shared stores."""
+        if self._poll_interval is None:
+            return remaining
+        return self._poll_interval if remaining is None else min(remaining, self._poll_interval)
 
 
 # Global singleton shared across Flask routes and caller
-manager = ConversationManager()
+manager = ConversationManager(store_from_env())
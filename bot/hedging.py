@@ -0,0 +1,216 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Optional
+
+
+class LatencyHistogram:
+    """Rolling window of request latencies (seconds) for one model."""
+
+    def __init__(self, window: int = 500) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def summary(self) -> dict:
+        def ms(pct: float) -> Optional[float]:
+            value = self.percentile(pct)
+            return None if value is None else round(value * 1000, 1)
+
+        return {"count": len(self), "p50_ms": ms(50), "p95_ms": ms(95), "p99_ms": ms(99)}
+
+
+class HedgeCancelled(Exception):
+    """Raised by a request that noticed the other side of the hedge already answered."""
+
+
+class Hedger:
+    """
+    Hedged requests: if the primary model hasn't answered by the given
+    percentile of its recent latencies, send a second request (to the same
+    or a fallback model) and take whichever finishes first.
+
+    Hedging only starts once min_samples latencies are known for the primary;
+    a primary that fails outright is retried on the fallback immediately,
+    unless the error is one of no_retry (e.g. rate limiting, where a second
+    request only makes things worse).  With percentile <= 0 there is no
+    hedge and no retry.  Every attempt's duration lands in its model's
+    histogram, failed or cut short ones included, so the percentiles aren't
+    just those of the requests that succeeded.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        min_samples: int = 20,
+        max_workers: int = 16,
+        no_retry: tuple[type[BaseException], ...] = (),
+    ) -> None:
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.no_retry = no_retry
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "failures": 0}
+
+    def histogram(self, model: str) -> LatencyHistogram:
+        with self._lock:
+            return self._histograms.setdefault(model, LatencyHistogram())
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """Seconds to wait on model before hedging, or None if hedging is off / not warmed up."""
+        hist = self.histogram(model)
+        if self.percentile <= 0 or len(hist) < self.min_samples:
+            return None
+        return hist.percentile(self.percentile)
+
+    def run(
+        self,
+        call: Callable[[str, threading.Event], str],
+        primary: str,
+        fallback: str,
+        timeout: float,
+    ) -> str:
+        """
+        Run call(model, cancelled) with hedging and return the first successful result.
+
+        Threads can't be interrupted, so cancelled is set once run() returns or
+        gives up; a request still in flight should check it (e.g. between
+        stream chunks) and stop, raising HedgeCancelled.
+        """
+        start = time.perf_counter()
+        deadline = start + timeout
+        delay = self.hedge_delay(primary)
+        cancelled = threading.Event()
+        futures = {self._pool.submit(self._timed, call, primary, cancelled): "primary"}
+        hedged = False
+        error: Optional[BaseException] = None
+        self._bump("requests")
+
+        try:
+            while futures:
+                now = time.perf_counter()
+                if not hedged and delay is not None:
+                    wait_for = min(start + delay, deadline) - now
+                else:
+                    wait_for = deadline - now
+                done, _ = wait(list(futures), timeout=max(0.0, wait_for), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    role = futures.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if role == "hedge":
+                        self._bump("hedge_wins")
+                    return result
+
+                now = time.perf_counter()
+                primary_failed = not futures and not hedged and self._retryable(error)
+                if not hedged and (primary_failed or (delay is not None and now - start >= delay)):
+                    futures[self._pool.submit(self._timed, call, fallback, cancelled)] = "hedge"
+                    hedged = True
+                    self._bump("hedged")
+                    continue
+                if now >= deadline:
+                    break
+        finally:
+            # Tell the losing (or timed-out) request to stop at its next check
+            cancelled.set()
+
+        self._bump("failures")
+        raise error or TimeoutError(f"no response from {primary}/{fallback} within {timeout}s")
+
+    async def arun(self, call: Callable[[str], Awaitable[str]], primary: str, fallback: str, timeout: float) -> str:
+        """run() for coroutines: call(model) is awaited as tasks on the running event loop."""
+        start = time.perf_counter()
+        deadline = start + timeout
+        delay = self.hedge_delay(primary)
+        tasks = {asyncio.ensure_future(self._atimed(call, primary)): "primary"}
+        hedged = False
+        error: Optional[BaseException] = None
+        self._bump("requests")
+
+        try:
+            while tasks:
+                now = time.perf_counter()
+                if not hedged and delay is not None:
+                    wait_for = min(start + delay, deadline) - now
+                else:
+                    wait_for = deadline - now
+                done, _ = await asyncio.wait(list(tasks), timeout=max(0.0, wait_for), return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    role = tasks.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if role == "hedge":
+                        self._bump("hedge_wins")
+                    return task.result()
+
+                now = time.perf_counter()
+                primary_failed = not tasks and not hedged and self._retryable(error)
+                if not hedged and (primary_failed or (delay is not None and now - start >= delay)):
+                    tasks[asyncio.ensure_future(self._atimed(call, fallback))] = "hedge"
+                    hedged = True
+                    self._bump("hedged")
+                    continue
+                if now >= deadline:
+                    break
+        finally:
+            # Unlike threads, the losing request can be cancelled outright
+            for task in tasks:
+                task.cancel()
+
+        self._bump("failures")
+        raise error or TimeoutError(f"no response from {primary}/{fallback} within {timeout}s")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            models = dict(self._histograms)
+        stats["hedge_rate"] = round(stats["hedged"] / stats["requests"], 3) if stats["requests"] else None
+        stats["hedge_win_rate"] = round(stats["hedge_wins"] / stats["hedged"], 3) if stats["hedged"] else None
+        stats["models"] = {model: hist.summary() for model, hist in models.items()}
+        return stats
+
+    def _retryable(self, error: Optional[BaseException]) -> bool:
+        return self.percentile > 0 and not isinstance(error, self.no_retry)
+
+    def _timed(self, call: Callable[[str, threading.Event], str], model: str, cancelled: threading.Event) -> str:
+        t0 = time.perf_counter()
+        try:
+            return call(model, cancelled)
+        finally:
+            self.histogram(model).add(time.perf_counter() - t0)
+
+    async def _atimed(self, call: Callable[[str], Awaitable[str]], model: str) -> str:
+        t0 = time.perf_counter()
+        try:
+            return await call(model)
+        finally:
+            self.histogram(model).add(time.perf_counter() - t0)
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
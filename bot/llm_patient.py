@@ -1,12 +1,60 @@
 import os
 import re
 import random
-from openai import OpenAI
+import threading
+import time
+from collections import deque
+from functools import lru_cache, partial
+from typing import Callable
+from openai import AsyncOpenAI, OpenAI, RateLimitError
+from bot.response_cache import ResponseCache, make_key
+from bot import slot_filler
+from bot.admission import LIVE, AdmissionTimeout, admission
+from bot.hedging import HedgeCancelled, Hedger
+from bot import metrics
+from bot.metrics import span
 
 _client: OpenAI | None = None
+_async_client: AsyncOpenAI | None = None
+_cache: ResponseCache | None = None
 
 COMPLETION_SENTINEL = "[CONVERSATION_COMPLETE]"
 
+MODEL = os.getenv("PATIENT_LLM_MODEL", "gpt-4o-mini")
+FALLBACK_MODEL = os.getenv("PATIENT_LLM_FALLBACK_MODEL", MODEL)
+LLM_TIMEOUT = 4.0
+
+# Send a hedge request once the primary passes this percentile of its recent latencies.
+# Off by default (0): every hedge is an extra OpenAI request and admission slot.
+# Rate-limited or unadmitted requests are never re-sent to the fallback.
+_hedger = Hedger(
+    percentile=float(os.getenv("PATIENT_LLM_HEDGE_PERCENTILE", "0")),
+    no_retry=(RateLimitError, AdmissionTimeout),
+)
+
+# Stream tier-2 tokens and return at the first complete sentence (set to 0 to disable)
+STREAMING = os.getenv("PATIENT_LLM_STREAM", "1") != "0"
+
+# Answer identity / DOB / opener / "anything else?" turns without the LLM (set to 0 to disable)
+FAST_PATH = os.getenv("PATIENT_FAST_PATH", "1") != "0"
+
+# Reuse tier-2 replies for repeated agent utterances across runs (off by default)
+CACHE_ENABLED = os.getenv("PATIENT_RESPONSE_CACHE", "0") == "1"
+
+# Recent time-to-first-token / total latency samples (seconds), newest last
+_ttft_samples: deque[float] = deque(maxlen=200)
+_total_samples: deque[float] = deque(maxlen=200)
+
+_AI_SLIP_RE = re.compile(r"\b(as an ai|i'm an ai|language model|i am an ai)\b", re.IGNORECASE)
+
+# A sentence ends at . ! or ? (plus closing quotes) followed by whitespace and a capital
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*\s+(?=[A-Z])")
+_ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "st", "jr", "sr", "vs"}
+
+# Closing lines carry the completion sentinel after a second short sentence
+# ("Okay. Thank you. [CONVERSATION_COMPLETE]") — read those to the end.
+_CLOSING_RE = re.compile(r"\b(thank|that's all|that is all|goodbye|bye)\b", re.IGNORECASE)
+
 # ── Tier-1 classifiers (regex, zero latency) ──────────────────────────────────
 
 # Agent is reading a legal/recording disclosure → human stays silent, waits
@@ -66,6 +114,9 @@ _HOLD_RESPONSES = [
 ]
 
 
+# Per-pattern reference implementations.  The live path uses Tier1Classifier;
+# benchmarks/bench_tier1.py checks that both produce identical labels.
+
 def _is_identity_question(text: str, patient_name: str = "") -> bool:
     """Returns True if the agent is cueing the patient to identify themselves.
 
@@ -99,6 +150,123 @@ def _tier1_classify(agent_text: str) -> str | None:
     return None
 
 
+class Tier1Classifier:
+    """
+    Precompiled single-pass version of _tier1_classify + _is_identity_question.
+
+    Every pattern family (plus the patient's first name) is merged into one
+    alternation of named groups, so an utterance is scanned once instead of
+    once per pattern.  Build one per patient via get_classifier().
+    """
+
+    def __init__(self, patient_name: str = "") -> None:
+        families: dict[str, list[str]] = {
+            "silence": _SILENCE_PATTERNS,
+            "hold": _HOLD_PATTERNS,
+            "result": _RESULT_PATTERNS,
+            "identity": _IDENTITY_PATTERNS,
+        }
+        first_name = patient_name.split()[0].lower() if patient_name.strip() else ""
+        if first_name:
+            families["name"] = [r"\b" + re.escape(first_name) + r"\b"]
+
+        self._families = {
+            name: re.compile("|".join(f"(?:{p})" for p in patterns))
+            for name, patterns in families.items()
+        }
+        starts = [_first_chars(p) for patterns in families.values() for p in patterns]
+        self._first_chars = None if None in starts else set().union(*starts)
+        self._scanners: dict[tuple[str, ...], re.Pattern] = {}
+        self._scanner(tuple(self._families))
+
+    def _scanner(self, names: tuple[str, ...]) -> re.Pattern:
+        """Combined alternation over the given families (cached per subset)."""
+        scanner = self._scanners.get(names)
+        if scanner is None:
+            combined = "|".join(f"(?P<{n}>{self._families[n].pattern})" for n in names)
+            # re has no literal-prefix optimisation for alternations, so reject
+            # positions that can't start any pattern with a cheap lookahead first.
+            if self._first_chars:
+                combined = f"(?=[{re.escape(''.join(sorted(self._first_chars)))}])(?:{combined})"
+            scanner = self._scanners[names] = re.compile(combined)
+        return scanner
+
+    def labels(self, text: str) -> set[str]:
+        """Return every category that matches anywhere in text."""
+        lower = text.lower()
+        found: set[str] = set()
+        remaining = tuple(self._families)
+        pos = 0
+        while remaining:
+            m = self._scanner(remaining).search(lower, pos)
+            if not m:
+                break
+            start = m.start()
+            # The alternation only reports the first family matching at this
+            # position — re-check each family here so overlaps aren't lost.
+            for name in remaining:
+                if self._families[name].match(lower, start):
+                    found.add(name)
+            remaining = tuple(n for n in remaining if n not in found)
+            pos = start + 1
+        return found
+
+    def classify(self, text: str) -> tuple[str | None, bool]:
+        """Return (tier-1 label, is_identity_question) from a single scan."""
+        found = self.labels(text)
+        if "silence" in found:
+            tier1 = "silence"
+        elif "hold" in found and "result" not in found:
+            tier1 = "hold"
+        else:
+            tier1 = None
+        return tier1, bool(found & {"identity", "name"})
+
+
+def _first_chars(pattern: str) -> set[str] | None:
+    """Characters a match of pattern can start with, or None if not simply derivable."""
+    while pattern.startswith(r"\b"):
+        pattern = pattern[2:]
+    if not pattern:
+        return None
+    if pattern[0] == "(":
+        depth, alts, start = 0, [], 1
+        for i, ch in enumerate(pattern):
+            if ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+                if depth == 0:
+                    alts.append(pattern[start:i])
+                    rest = pattern[i + 1:]
+                    break
+            elif ch == "|" and depth == 1:
+                alts.append(pattern[start:i])
+                start = i + 1
+        else:
+            return None
+        if rest[:1] in ("?", "*", "{") or any(not alt for alt in alts):
+            return None
+        chars: set[str] = set()
+        for alt in alts:
+            alt_chars = _first_chars(alt + rest)
+            if alt_chars is None:
+                return None
+            chars |= alt_chars
+        return chars
+    if pattern[0].isalnum() or pattern[0] in " '":
+        if pattern[1:2] in ("?", "*", "{"):
+            return None
+        return {pattern[0]}
+    return None
+
+
+@lru_cache(maxsize=64)
+def get_classifier(patient_name: str = "") -> Tier1Classifier:
+    """Compiled classifier for this patient — built once, reused for every turn."""
+    return Tier1Classifier(patient_name)
+
+
 # ── System prompt ──────────────────────────────────────────────────────────────
 
 def _build_system_prompt(scenario, patient: dict, has_spoken: bool) -> str:
@@ -186,6 +354,45 @@ ABSOLUTE RULES:
 7. {COMPLETION_SENTINEL} goes at the very end of your final message only."""
 
 
+# ── Message assembly ───────────────────────────────────────────────────────────
+
+def _build_messages(scenario, patient: dict, has_spoken: bool, history: list[dict], agent_text: str) -> list[dict]:
+    """Rebuild the full chat message list from history (no session available)."""
+    messages: list[dict] = [
+        {"role": "system", "content": _build_system_prompt(scenario, patient, has_spoken)}
+    ]
+
+    for turn in history:
+        if turn["role"] == "agent":
+            messages.append({"role": "user", "content": turn["text"]})
+        else:
+            messages.append({"role": "assistant", "content": turn["text"]})
+
+    messages.append({"role": "user", "content": agent_text})
+    return messages
+
+
+def _session_messages(session: dict, scenario, patient: dict, has_spoken: bool, agent_text: str) -> list[dict]:
+    """
+    Chat messages from the session's append-only buffer.
+
+    The system prompt is built once per has_spoken variant and reused, so the
+    prefix stays byte-identical turn to turn (provider prompt caching can hit).
+    The webhook records the agent turn before calling us, so agent_text is
+    normally already the last buffered message.
+    """
+    system = session["system_prompts"].get(has_spoken)
+    if system is None:
+        system = {"role": "system", "content": _build_system_prompt(scenario, patient, has_spoken)}
+        session["system_prompts"][has_spoken] = system
+
+    buffer = session["messages"]
+    messages = [system, *buffer]
+    if not buffer or buffer[-1] != {"role": "user", "content": agent_text}:
+        messages.append({"role": "user", "content": agent_text})
+    return messages
+
+
 # ── Public API ─────────────────────────────────────────────────────────────────
 
 def generate_patient_response(
@@ -193,6 +400,8 @@ def generate_patient_response(
     patient: dict,
     history: list[dict],
     agent_text: str,
+    session: dict | None = None,
+    trace: dict | None = None,
 ) -> tuple[str, bool]:
     """
     Generate the next patient utterance.
@@ -200,52 +409,165 @@ def generate_patient_response(
     Returns (patient_text, is_complete).
     patient_text == "" means the agent said something (e.g. a disclosure)
     that a real human would stay silent through — caller should keep listening.
+
+    Pass the ConversationManager session to reuse its prebuilt message buffer
+    and cached system prompts instead of rebuilding them from history.
+    Pass a dict as trace to learn which path produced the reply: trace["tier"]
+    is one of silence | hold | gate | rule | cache | llm | error,
+    trace["rule"] names the slot-filling rule when tier == "rule", and
+    trace["spans_ms"] times each stage that ran.
+    """
+    reply, tier2 = prepare_patient_response(scenario, patient, history, agent_text, session, trace)
+    return reply if tier2 is None else tier2()
+
+
+def prepare_patient_response(
+    scenario,
+    patient: dict,
+    history: list[dict],
+    agent_text: str,
+    session: dict | None = None,
+    trace: dict | None = None,
+) -> tuple[tuple[str, bool] | None, Callable[[], tuple[str, bool]] | None]:
+    """
+    generate_patient_response split at the tier-2 request.
+
+    Returns (reply, None) when tier 1, slot filling or the response cache
+    answered, else (None, tier2) where tier2() makes the LLM request and
+    returns the reply — so callers can run only that part on a worker thread.
+    """
+    if trace is None:
+        trace = {}
+    reply, raw, messages, cache_key = _prepare_reply(scenario, patient, history, agent_text, session, trace)
+    if reply is not None:
+        return reply, None
+    if raw is not None:
+        return _finish_reply(raw, cache_key), None
+    return None, partial(_tier2_reply, messages, cache_key, trace)
+
+
+def _tier2_reply(messages: list[dict], cache_key: str | None, trace: dict) -> tuple[str, bool]:
+    try:
+        complete = _complete_streaming if STREAMING else _complete
+        with span(trace["spans_ms"], "llm"):
+            raw = _hedger.run(
+                lambda model, cancelled: _admitted(complete, messages, model, cancelled),
+                MODEL, FALLBACK_MODEL, LLM_TIMEOUT,
+            )
+    except Exception as e:
+        print(f"[llm] Error generating response: {e}")
+        trace["tier"] = "error"
+        return "Sorry, could you repeat that?", False
+
+    return _finish_reply(raw, cache_key)
+
+
+async def agenerate_patient_response(
+    scenario,
+    patient: dict,
+    history: list[dict],
+    agent_text: str,
+    session: dict | None = None,
+    trace: dict | None = None,
+) -> tuple[str, bool]:
+    """generate_patient_response for the async webhook server: tier-2 runs on the AsyncOpenAI client."""
+    if trace is None:
+        trace = {}
+    reply, raw, messages, cache_key = _prepare_reply(scenario, patient, history, agent_text, session, trace)
+    if reply is not None:
+        return reply
+
+    if raw is None:
+        try:
+            complete = _acomplete_streaming if STREAMING else _acomplete
+            with span(trace["spans_ms"], "llm"):
+                raw = await _hedger.arun(
+                    lambda model: _aadmitted(complete, messages, model), MODEL, FALLBACK_MODEL, LLM_TIMEOUT,
+                )
+        except Exception as e:
+            print(f"[llm] Error generating response: {e}")
+            trace["tier"] = "error"
+            return "Sorry, could you repeat that?", False
+
+    return _finish_reply(raw, cache_key)
+
+
+def _prepare_reply(scenario, patient: dict, history: list[dict], agent_text: str, session: dict | None, trace: dict):
+    """
+    Everything before the tier-2 request.
+
+    Returns (reply, raw, messages, cache_key): reply is set when no LLM call is
+    needed; raw is set on a response-cache hit; otherwise messages are ready to send.
     """
+    spans = trace.setdefault("spans_ms", {})
+
     # ── Tier-1: regex classifiers (no API call, zero latency) ─────────────────
-    tier1 = _tier1_classify(agent_text)
+    with span(spans, "tier1"):
+        tier1, is_identity = get_classifier(patient.get("full_name", "")).classify(agent_text)
 
     if tier1 == "silence":
         # Stay silent — human wouldn't respond to a legal disclosure
-        return "", False
+        trace["tier"] = "silence"
+        return ("", False), None, None, None
 
     if tier1 == "hold":
         # Agent is processing — brief acknowledgment only
-        return random.choice(_HOLD_RESPONSES), False
+        trace["tier"] = "hold"
+        return (random.choice(_HOLD_RESPONSES), False), None, None, None
 
     # ── Pre-identity gate: stay silent until agent asks "Am I speaking with X?" ─
-    has_spoken = any(t["role"] == "patient" for t in history)
-    if not has_spoken and not _is_identity_question(agent_text, patient.get("full_name", "")):
+    if session is not None:
+        has_spoken = session["has_spoken"]
+    else:
+        has_spoken = any(t["role"] == "patient" for t in history)
+    if not has_spoken and not is_identity:
         # Agent is still in preamble (greeting, intro) — real humans don't speak yet
-        return "", False
+        trace["tier"] = "gate"
+        return ("", False), None, None, None
+
+    # Whoever answers the first open prompt (rule or LLM) gives the reason for
+    # calling; the flag on the recorded turn sets session["said_reason"]
+    if session is not None:
+        said_reason = session.get("said_reason", False)
+    else:
+        said_reason = any(t.get("opener") for t in history)
+    if has_spoken and not said_reason and slot_filler.is_open_prompt(agent_text):
+        trace["opener"] = True
+
+    # ── Deterministic slot filling: identity, DOB, opener, closing ────────────
+    if FAST_PATH:
+        with span(spans, "slot_filler"):
+            slot = slot_filler.answer(scenario, patient, said_reason, agent_text, has_spoken, is_identity)
+        if slot:
+            trace.update(tier="rule", rule=slot.rule)
+            return (slot.text, slot.is_complete), None, None, None
 
     # ── Tier-2: GPT generates the contextual response ─────────────────────────
-    messages: list[dict] = [
-        {"role": "system", "content": _build_system_prompt(scenario, patient, has_spoken)}
-    ]
-
-    for turn in history:
-        if turn["role"] == "agent":
-            messages.append({"role": "user", "content": turn["text"]})
+    cache_key = None
+    if CACHE_ENABLED and scenario.cache_responses:
+        with span(spans, "cache_lookup"):
+            cache_key = make_key(scenario.id, agent_text, history, has_spoken)
+            raw = _get_cache().get(cache_key)
+        if raw is not None:
+            trace["tier"] = "cache"
+            return None, raw, None, None
+
+    trace["tier"] = "llm"
+    with span(spans, "prompt_build"):
+        if session is not None:
+            messages = _session_messages(session, scenario, patient, has_spoken, agent_text)
         else:
-            messages.append({"role": "assistant", "content": turn["text"]})
+            messages = _build_messages(scenario, patient, has_spoken, history, agent_text)
+    return None, None, messages, cache_key
 
-    messages.append({"role": "user", "content": agent_text})
 
-    try:
-        response = _get_client().chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            max_tokens=120,
-            temperature=0.7,
-            timeout=4.0,
-        )
-        raw = response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"[llm] Error generating response: {e}")
-        return "Sorry, could you repeat that?", False
+def _finish_reply(raw: str, cache_key: str | None) -> tuple[str, bool]:
+    """Cache a fresh tier-2 reply, guard against AI slips and strip the completion sentinel."""
+    if cache_key and raw and not _AI_SLIP_RE.search(raw):
+        _get_cache().put(cache_key, raw)
 
     # Guard: strip any AI self-identification slip-through
-    if re.search(r"\b(as an ai|i'm an ai|language model|i am an ai)\b", raw, re.IGNORECASE):
+    if _AI_SLIP_RE.search(raw):
         return "Sorry, could you say that again?", False
 
     is_complete = COMPLETION_SENTINEL in raw
@@ -254,8 +576,255 @@ def generate_patient_response(
     return clean_text, is_complete
 
 
+def _admitted(complete, messages: list[dict], model: str, cancelled: threading.Event) -> str:
+    """Run one tier-2 request under a live-priority admission slot, unless the hedge was already won."""
+    with admission.slot(LIVE, timeout=LLM_TIMEOUT):
+        if cancelled.is_set():
+            raise HedgeCancelled(model)
+        try:
+            return complete(messages, model, cancelled)
+        except RateLimitError as e:
+            admission.backoff(_retry_after(e))
+            raise
+
+
+async def _aadmitted(complete, messages: list[dict], model: str) -> str:
+    await admission.acquire_async(LIVE, timeout=LLM_TIMEOUT)
+    try:
+        return await complete(messages, model)
+    except RateLimitError as e:
+        admission.backoff(_retry_after(e))
+        raise
+    finally:
+        admission.release(LIVE)
+
+
+def _retry_after(error: RateLimitError, default: float = 1.0) -> float:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return default
+
+
+def _complete(messages: list[dict], model: str = MODEL, cancelled: threading.Event | None = None) -> str:
+    start = time.perf_counter()
+    response = _get_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=120,
+        temperature=0.7,
+        timeout=LLM_TIMEOUT,
+    )
+    _total_samples.append(time.perf_counter() - start)
+    return response.choices[0].message.content.strip()
+
+
+def _complete_streaming(messages: list[dict], model: str = MODEL, cancelled: threading.Event | None = None) -> str:
+    """
+    Stream the completion and return as soon as the first sentence is complete.
+
+    The prompt asks for one sentence per turn, so anything after the first
+    sentence is usually dead air — but the completion sentinel can trail a
+    later one.  Reading continues until a second sentence completes (then the
+    reply is cut back to the first) or the stream ends; it stops early when
+    the sentinel or an AI self-identification slip shows up, and closing lines
+    are read to the end so the sentinel isn't lost.  When cancelled is set
+    (the other side of a hedge answered) the stream is closed mid-read.
+    """
+    start = time.perf_counter()
+    deadline = start + LLM_TIMEOUT
+    stream = _get_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=120,
+        temperature=0.7,
+        timeout=LLM_TIMEOUT,
+        stream=True,
+    )
+
+    text = ""
+    first_token_at: float | None = None
+    try:
+        for chunk in stream:
+            if cancelled is not None and cancelled.is_set():
+                raise HedgeCancelled(model)
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            text += delta
+
+            done = _stream_cut(text)
+            if done is not None:
+                text = done
+                break
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"stream exceeded {LLM_TIMEOUT}s")
+    finally:
+        stream.close()
+
+    _record_latency(start, first_token_at)
+    return text.strip()
+
+
+async def _acomplete(messages: list[dict], model: str = MODEL) -> str:
+    start = time.perf_counter()
+    response = await _get_async_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=120,
+        temperature=0.7,
+        timeout=LLM_TIMEOUT,
+    )
+    _total_samples.append(time.perf_counter() - start)
+    return response.choices[0].message.content.strip()
+
+
+async def _acomplete_streaming(messages: list[dict], model: str = MODEL) -> str:
+    """_complete_streaming on the AsyncOpenAI client."""
+    start = time.perf_counter()
+    deadline = start + LLM_TIMEOUT
+    stream = await _get_async_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=120,
+        temperature=0.7,
+        timeout=LLM_TIMEOUT,
+        stream=True,
+    )
+
+    text = ""
+    first_token_at: float | None = None
+    try:
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            text += delta
+
+            done = _stream_cut(text)
+            if done is not None:
+                text = done
+                break
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"stream exceeded {LLM_TIMEOUT}s")
+    finally:
+        await stream.close()
+
+    _record_latency(start, first_token_at)
+    return text.strip()
+
+
+def _stream_cut(text: str) -> str | None:
+    """The reply to keep if reading the stream can stop now, else None."""
+    if COMPLETION_SENTINEL in text or _AI_SLIP_RE.search(text):
+        return text
+    first = _first_sentence_end(text)
+    if first is None:
+        return None
+    second = _first_sentence_end(text, first)
+    if second is None or _CLOSING_RE.search(text[:second]):
+        return None
+    return text[:first]
+
+
+def _record_latency(start: float, first_token_at: float | None) -> None:
+    end = time.perf_counter()
+    _total_samples.append(end - start)
+    if first_token_at is not None:
+        _ttft_samples.append(first_token_at - start)
+        print(f"[llm] ttft={(first_token_at - start) * 1000:.0f}ms total={(end - start) * 1000:.0f}ms")
+
+
+def _first_sentence_end(text: str, start: int = 0) -> int | None:
+    """Index just past the first sentence terminator after start, or None if no sentence has ended yet."""
+    for m in _SENTENCE_END_RE.finditer(text, start):
+        words = text[:m.start()].split()
+        if words and words[-1].lower().rstrip(".") in _ABBREVIATIONS:
+            continue
+        return m.start() + len(m.group().rstrip())
+    return None
+
+
+def get_latency_stats() -> dict:
+    """Tier-2 latency over recent turns (ms): TTFT/total medians plus per-model hedging stats."""
+    def median_ms(samples: deque[float]) -> float | None:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return round(ordered[len(ordered) // 2] * 1000, 1)
+
+    return {
+        "streaming": STREAMING,
+        "samples": len(_total_samples),
+        "ttft_p50_ms": median_ms(_ttft_samples),
+        "total_p50_ms": median_ms(_total_samples),
+        "hedging": _hedger.stats(),
+    }
+
+
+def latency_metric_lines() -> list[str]:
+    """get_latency_stats() as Prometheus gauges for /metrics."""
+    stats = get_latency_stats()
+    hedging = stats["hedging"]
+    models = hedging.pop("models")
+    lines = metrics.gauge(
+        "patient_llm_latency_p50_ms", "Median tier-2 time to first token / to the whole reply (recent turns).", "stage",
+        {stage: stats[f"{stage}_p50_ms"] for stage in ("ttft", "total") if stats[f"{stage}_p50_ms"] is not None},
+    )
+    for pct in ("p50", "p95", "p99"):
+        lines += metrics.gauge(
+            f"patient_llm_model_latency_{pct}_ms", f"{pct} of recent tier-2 attempts per model, failures included.", "model",
+            {model: summary[f"{pct}_ms"] for model, summary in models.items() if summary[f"{pct}_ms"] is not None},
+        )
+    lines += metrics.gauge(
+        "patient_llm_hedging", "Tier-2 request, hedge, hedge-win and failure counts, and the hedge / win rates.", "stat",
+        {stat: value for stat, value in hedging.items() if value is not None},
+    )
+    return lines
+
+
+metrics.register_collector(latency_metric_lines)
+
+
+def get_cache_stats() -> dict | None:
+    """Hit/miss counters for the tier-2 response cache, or None when disabled."""
+    return _get_cache().stats() if CACHE_ENABLED else None
+
+
+def cache_metric_lines() -> list[str]:
+    """get_cache_stats() as a Prometheus gauge for /metrics (nothing when the cache is off)."""
+    stats = get_cache_stats()
+    if stats is None:
+        return []
+    return metrics.gauge(
+        "patient_response_cache", "Tier-2 response cache hits, misses, stores, evictions, entries and hit rate.", "stat",
+        {stat: value for stat, value in stats.items() if value is not None},
+    )
+
+
+metrics.register_collector(cache_metric_lines)
+
+
+def _get_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache.from_env()
+    return _cache
+
+
 def _get_client() -> OpenAI:
     global _client
     if _client is None:
         _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     return _client
+
+
+def _get_async_client() -> AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _async_client
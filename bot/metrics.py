@@ -0,0 +1,137 @@
+import bisect
+import threading
+import time
+from typing import Callable, Optional
+
+# Which path produced a patient turn, by trace["tier"]
+TIER_PATHS = {
+    "silence": "regex",
+    "hold": "regex",
+    "gate": "regex",
+    "rule": "deterministic",
+    "cache": "cache",
+    "llm": "llm",
+    "error": "llm",
+}
+
+# Seconds; covers sub-millisecond regex work up to a slow LLM turn
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0,
+)
+
+
+class span:
+    """
+    Time a block into spans[name] (milliseconds, accumulated if repeated).
+
+        with span(trace.setdefault("spans_ms", {}), "llm"):
+            raw = complete(messages)
+    """
+
+    __slots__ = ("_spans", "_name", "_start")
+
+    def __init__(self, spans: dict, name: str) -> None:
+        self._spans = spans
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        elapsed_ms = (time.perf_counter() - self._start) * 1000
+        self._spans[self._name] = round(self._spans.get(self._name, 0.0) + elapsed_ms, 3)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with labels."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets=DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}   # label values → [bucket counts…, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+
+turn_seconds = Histogram(
+    "patient_turn_seconds",
+    "Time from the agent's speech arriving at /gather to the patient's TwiML being ready.",
+    ("path", "tier"),
+)
+stage_seconds = Histogram(
+    "patient_turn_stage_seconds",
+    "Time spent in each stage of a patient turn (tier1, slot_filler, cache_lookup, prompt_build, llm, twiml).",
+    ("stage", "path", "tier"),
+)
+transcript_io_seconds = Histogram(
+    "transcript_io_seconds",
+    "Time from queueing a finished call's transcript to it being on disk.",
+    ("backend",),
+)
+admission_wait_seconds = Histogram(
+    "llm_admission_wait_seconds",
+    "Time an LLM request waited for admission (concurrency slot + rate-limit token).",
+    ("priority",),
+)
+
+# Extra exposition lines (e.g. gauges) from other modules, appended by render()
+_collectors: list[Callable[[], list[str]]] = []
+
+
+def register_collector(collector: Callable[[], list[str]]) -> None:
+    _collectors.append(collector)
+
+
+def gauge(name: str, help_text: str, label_name: str, values: dict[str, float]) -> list[str]:
+    """Exposition lines for a gauge with one label."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    lines.extend(f'{name}{{{label_name}="{label}"}} {value}' for label, value in values.items())
+    return lines
+
+
+def observe_turn(trace: dict, total_seconds: Optional[float] = None) -> None:
+    """Fold one turn's trace (tier + spans_ms) into the histograms."""
+    tier = trace.get("tier", "unknown")
+    path = TIER_PATHS.get(tier, "unknown")
+    for stage, ms in trace.get("spans_ms", {}).items():
+        stage_seconds.observe(ms / 1000, stage, path, tier)
+    if total_seconds is not None:
+        turn_seconds.observe(total_seconds, path, tier)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for histogram in (turn_seconds, stage_seconds, transcript_io_seconds, admission_wait_seconds):
+        lines.extend(histogram.render())
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
@@ -1,6 +1,7 @@
 import os
 from pyngrok import ngrok, conf
-from twilio.rest import Client
+
+from bot.twilio_client import get_twilio_client
 
 
 def start_and_configure(port: int) -> str:
@@ -22,12 +23,7 @@ def start_and_configure(port: int) -> str:
 
     # Update Twilio voice webhook URL so calls route here
     from_number = os.getenv("TWILIO_FROM_NUMBER")
-    twilio_client = Client(
-        os.getenv("TWILIO_ACCOUNT_SID"),
-        os.getenv("TWILIO_AUTH_TOKEN"),
-    )
-
-    numbers = twilio_client.incoming_phone_numbers.list(phone_number=from_number)
+    numbers = get_twilio_client().incoming_phone_numbers.list(phone_number=from_number)
     if numbers:
         numbers[0].update(voice_url=f"{public_url}/voice", voice_method="POST")
         print(f"[ngrok] Twilio webhook updated → {public_url}/voice")
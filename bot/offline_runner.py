@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Offline text-mode scenario runner — no Twilio, ngrok or phone line.
+
+Drives generate_patient_response against a pluggable stand-in for Athena and
+writes the same transcript JSON as a live call via analysis/transcript_store.
+
+Usage:
+  python -m bot.offline_runner                               # every scenario, scripted Athena
+  python -m bot.offline_runner --scenario 02_weekend_scheduling --repeat 50 --workers 16
+  python -m bot.offline_runner --agent llm --agent-base-url http://localhost:8001/v1
+"""
+import argparse
+import glob
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from openai import OpenAI  # noqa: E402
+
+from analysis.transcript_store import TRANSCRIPTS_DIR, save_transcript  # noqa: E402
+from bot.conversation_manager import manager  # noqa: E402
+from bot.llm_patient import generate_patient_response  # noqa: E402
+from db.client import get_active_patient  # noqa: E402
+
+MAX_TURNS = int(os.getenv("MAX_TURNS_PER_CALL", "15"))
+OFFLINE_DIR = os.path.join(TRANSCRIPTS_DIR, "offline")
+
+FAREWELL = "Thank you so much for your help. I'll call back if I need anything. Goodbye."
+
+
+# ── Agent stand-ins ───────────────────────────────────────────────────────────
+
+class ScriptedAgent:
+    """Replays the agent turns of a recorded transcript, ignoring what the patient says."""
+
+    def __init__(self, agent_turns: list[str]) -> None:
+        self._turns = list(agent_turns)
+        self._pos = 0
+
+    @classmethod
+    def from_transcript(cls, path: str) -> "ScriptedAgent":
+        with open(path) as f:
+            data = json.load(f)
+        return cls([t["text"] for t in data.get("transcript", []) if t["role"] == "agent"])
+
+    def next_utterance(self, patient_reply: Optional[str]) -> Optional[str]:
+        if self._pos >= len(self._turns):
+            return None
+        text = self._turns[self._pos]
+        self._pos += 1
+        return text
+
+
+ATHENA_PROMPT = """You are Athena, the AI phone scheduler for Pivot Point Orthopedics.
+You are on a phone call with a patient named {patient_name}. Keep each reply to one or two
+short spoken sentences. Verify identity and date of birth before helping. The office is open
+Monday to Friday, 8am to 5pm. Refer medical emergencies to 911. Never share other patients'
+information."""
+
+
+class LLMAgent:
+    """Athena played by any OpenAI-compatible chat endpoint."""
+
+    def __init__(self, patient_name: str, base_url: Optional[str] = None, model: str = "gpt-4o-mini") -> None:
+        self._client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "offline"), base_url=base_url)
+        self._model = model
+        self._first_name = patient_name.split()[0] if patient_name else ""
+        self._messages = [{"role": "system", "content": ATHENA_PROMPT.format(patient_name=patient_name)}]
+        self._opened = False
+
+    def next_utterance(self, patient_reply: Optional[str]) -> Optional[str]:
+        if not self._opened:
+            self._opened = True
+            opening = f"Thanks for calling Pivot Point Orthopedics. Am I speaking with {self._first_name}?"
+            self._messages.append({"role": "assistant", "content": opening})
+            return opening
+
+        self._messages.append({"role": "user", "content": patient_reply or "(silence)"})
+        response = self._client.chat.completions.create(
+            model=self._model,
+            messages=self._messages,
+            max_tokens=120,
+            temperature=0.5,
+        )
+        text = (response.choices[0].message.content or "").strip()
+        self._messages.append({"role": "assistant", "content": text})
+        return text or None
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+def run_conversation(scenario, patient: dict, agent, output_dir: str = OFFLINE_DIR, run_id: int = 0) -> dict:
+    """Run one scenario to completion against agent and save its transcript."""
+    call_sid = f"OFFLINE{uuid.uuid4().hex[:26]}"
+    manager.create_session(call_sid, scenario, patient)
+    tiers: Counter = Counter()
+
+    patient_reply: Optional[str] = None
+    while True:
+        agent_text = agent.next_utterance(patient_reply)
+        if not agent_text:
+            break
+
+        # Same sequence as the /gather webhook
+        session = manager.add_turn(call_sid, "agent", agent_text)
+        if session["turn_count"] >= MAX_TURNS:
+            manager.add_turn(call_sid, "patient", FAREWELL)
+            break
+
+        trace: dict = {}
+        patient_reply, is_complete = generate_patient_response(
+            scenario, patient, session["history"], agent_text, session=session, trace=trace,
+        )
+        tiers[trace.get("tier", "?")] += 1
+        if patient_reply:
+            manager.add_turn(call_sid, "patient", patient_reply, meta=trace)
+        if is_complete:
+            break
+
+    manager.mark_complete(call_sid)
+    info = manager.get_session_info(call_sid)
+    _, json_path = save_transcript(
+        call_sid, info, manager.get_transcript(call_sid), output_dir, name_suffix=f"_{run_id:04d}",
+    )
+    manager.mark_persisted(call_sid)
+    return {"scenario_id": scenario.id, "turns": info["turn_count"], "tiers": tiers, "path": json_path}
+
+
+def latest_transcript(scenario_id: str, transcripts_dir: str = TRANSCRIPTS_DIR) -> Optional[str]:
+    matches = sorted(glob.glob(os.path.join(transcripts_dir, f"{scenario_id}_*.json")))
+    return matches[-1] if matches else None
+
+
+def main() -> None:
+    from scenarios.patient_scenarios import ALL_SCENARIOS
+
+    parser = argparse.ArgumentParser(description="Run patient scenarios offline against a stand-in agent")
+    parser.add_argument("--scenario", action="append", help="scenario id (repeatable); default all")
+    parser.add_argument("--repeat", type=int, default=1, help="conversations per scenario")
+    parser.add_argument("--workers", type=int, default=8, help="conversations run concurrently")
+    parser.add_argument("--agent", choices=["scripted", "llm"], default="scripted")
+    parser.add_argument("--agent-base-url", default=None, help="OpenAI-compatible endpoint for --agent llm")
+    parser.add_argument("--agent-model", default="gpt-4o-mini")
+    parser.add_argument("--output-dir", default=OFFLINE_DIR)
+    args = parser.parse_args()
+
+    patient = get_active_patient()
+    if not patient:
+        raise SystemExit("[offline] PATIENT_FULL_NAME and PATIENT_DOB must be set")
+
+    scenarios = [s for s in ALL_SCENARIOS if not args.scenario or s.id in args.scenario]
+
+    scripts: dict[str, str] = {}
+    if args.agent == "scripted":
+        for scenario in list(scenarios):
+            path = latest_transcript(scenario.id)
+            if path:
+                scripts[scenario.id] = path
+            else:
+                print(f"[offline] No recorded transcript for {scenario.id} — skipping")
+                scenarios.remove(scenario)
+
+    def make_agent(scenario):
+        if args.agent == "llm":
+            return LLMAgent(patient["full_name"], args.agent_base_url, args.agent_model)
+        return ScriptedAgent.from_transcript(scripts[scenario.id])
+
+    jobs = [(s, n) for s in scenarios for n in range(args.repeat)]
+    if not jobs:
+        raise SystemExit("[offline] Nothing to run")
+
+    start = time.time()
+    tiers: Counter = Counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [
+            pool.submit(run_conversation, s, patient, make_agent(s), args.output_dir, i)
+            for i, (s, _) in enumerate(jobs)
+        ]
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[offline] Conversation failed: {e}")
+                continue
+            tiers.update(result["tiers"])
+
+    elapsed = time.time() - start
+    print(f"[offline] {len(jobs)} conversations in {elapsed:.1f}s ({len(jobs) / elapsed * 60:.0f}/min)")
+    print(f"[offline] Patient turns by tier: {dict(tiers)}")
+    print(f"[offline] Transcripts → {args.output_dir}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+CACHE_DIR = "cache"
+CACHE_DB_PATH = os.path.join(CACHE_DIR, "patient_responses.sqlite")
+
+# Number of turns before the current agent utterance that are part of the key
+HISTORY_WINDOW = 4
+
+_NON_WORD = re.compile(r"[^a-z0-9' ]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so ASR jitter still hits."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+def make_key(scenario_id: str, agent_text: str, history: list[dict], has_spoken: bool) -> str:
+    """Cache key over scenario, normalized agent text and a normalized recent-history window."""
+    # The webhook records the agent turn before asking for a reply — don't count it twice
+    if history and history[-1]["role"] == "agent" and history[-1]["text"] == agent_text:
+        history = history[:-1]
+    window = [f"{t['role']}:{normalize(t['text'])}" for t in history[-HISTORY_WINDOW:]]
+    payload = json.dumps([scenario_id, has_spoken, normalize(agent_text), window])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of tier-2 patient replies.
+
+    An in-memory LRU (bounded by max_size, entries expire after ttl seconds)
+    sits in front of a SQLite table that persists across runs.  Values are
+    the raw LLM text, including the completion sentinel if present.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 2048,
+        ttl: float = 7 * 24 * 3600,
+        db_path: Optional[str] = CACHE_DB_PATH,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, created REAL NOT NULL, response TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        disk = os.getenv("PATIENT_RESPONSE_CACHE_DISK", "1") != "0"
+        return cls(
+            max_size=int(os.getenv("PATIENT_RESPONSE_CACHE_SIZE", "2048")),
+            ttl=float(os.getenv("PATIENT_RESPONSE_CACHE_TTL", str(7 * 24 * 3600))),
+            db_path=CACHE_DB_PATH if disk else None,
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                created, response = entry
+                if now - created < self.ttl:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return response
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT created, response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[0] < self.ttl:
+                    self._remember(key, row[0], row[1])
+                    self._stats["disk_hits"] += 1
+                    return row[1]
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response)
+            self._stats["stores"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, created, response) VALUES (?, ?, ?)",
+                    (key, now, response),
+                )
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else None
+        return stats
+
+    def _remember(self, key: str, created: float, response: str) -> None:
+        self._memory[key] = (created, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
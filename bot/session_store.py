@@ -0,0 +1,313 @@
+"""
+Session storage behind ConversationManager.
+
+ShardedMemoryStore keeps live session dicts in-process, split across shards
+that each have their own lock.  SQLiteSessionStore keeps them in a shared
+database file so several webhook worker processes see the same calls.
+
+Both evict completed sessions once their transcript has been persisted
+(mark_persisted), after ttl seconds or when more than max_completed are
+being retained, least recently persisted first.  Sessions that are never
+persisted (e.g. a call that never got a final /status) are dropped max_age
+seconds after they were created.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+SESSION_TTL = float(os.getenv("SESSION_TTL_SECONDS", "900"))
+SESSION_MAX_COMPLETED = int(os.getenv("SESSION_MAX_COMPLETED", "1000"))
+SESSION_MAX_AGE = float(os.getenv("SESSION_MAX_AGE_SECONDS", "3600"))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", os.path.join("cache", "sessions.sqlite"))
+
+
+class SessionStore:
+    """
+    Interface for session storage.
+
+    update() is the only way to change a session: fn runs with the session
+    locked (or inside a write transaction) and its return value is passed back.
+    """
+
+    # True when other processes can change sessions, so waiters must poll
+    shared = False
+
+    def put(self, call_sid: str, session: dict) -> None:
+        raise NotImplementedError
+
+    def get(self, call_sid: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def update(self, call_sid: str, fn: Callable[[dict], Any]) -> Any:
+        """Apply fn to the session atomically. Returns fn's result, or None if there is no session."""
+        raise NotImplementedError
+
+    def read(self, call_sid: str, fn: Callable[[dict], Any]) -> Any:
+        """Like update() for fn that only reads the session."""
+        session = self.get(call_sid)
+        return fn(session) if session is not None else None
+
+    def delete(self, call_sid: str) -> None:
+        raise NotImplementedError
+
+    def mark_persisted(self, call_sid: str) -> None:
+        """The session's transcript is saved; it may be evicted from now on."""
+        raise NotImplementedError
+
+    def evict(self) -> int:
+        """Drop persisted sessions past ttl or beyond max_completed, and any past max_age. Returns how many were dropped."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+# ── In-memory ─────────────────────────────────────────────────────────────────
+
+class ShardedMemoryStore(SessionStore):
+    """Live session dicts in shards, each with its own lock, so webhooks for different calls don't contend."""
+
+    def __init__(
+        self,
+        shards: int = 16,
+        ttl: float = SESSION_TTL,
+        max_completed: int = SESSION_MAX_COMPLETED,
+        max_age: float = SESSION_MAX_AGE,
+    ) -> None:
+        self._shards = [({}, threading.Lock()) for _ in range(max(1, shards))]
+        self.ttl = ttl
+        self.max_completed = max_completed
+        self.max_age = max_age
+        # call_sid → persisted-at, oldest first
+        self._evictable: OrderedDict[str, float] = OrderedDict()
+        # call_sid → created-at for sessions not yet persisted, oldest first
+        self._unpersisted: OrderedDict[str, float] = OrderedDict()
+        self._evict_lock = threading.Lock()
+
+    def _shard(self, call_sid: str) -> tuple[dict, threading.Lock]:
+        return self._shards[zlib.crc32(call_sid.encode()) % len(self._shards)]
+
+    def put(self, call_sid: str, session: dict) -> None:
+        sessions, lock = self._shard(call_sid)
+        with lock:
+            sessions[call_sid] = session
+        with self._evict_lock:
+            self._evictable.pop(call_sid, None)
+            self._unpersisted[call_sid] = time.monotonic()
+            self._unpersisted.move_to_end(call_sid)
+        self.evict()
+
+    def get(self, call_sid: str) -> Optional[dict]:
+        sessions, lock = self._shard(call_sid)
+        with lock:
+            return sessions.get(call_sid)
+
+    def update(self, call_sid: str, fn: Callable[[dict], Any]) -> Any:
+        sessions, lock = self._shard(call_sid)
+        with lock:
+            session = sessions.get(call_sid)
+            return fn(session) if session is not None else None
+
+    read = update
+
+    def delete(self, call_sid: str) -> None:
+        sessions, lock = self._shard(call_sid)
+        with lock:
+            sessions.pop(call_sid, None)
+        with self._evict_lock:
+            self._evictable.pop(call_sid, None)
+            self._unpersisted.pop(call_sid, None)
+
+    def mark_persisted(self, call_sid: str) -> None:
+        with self._evict_lock:
+            self._unpersisted.pop(call_sid, None)
+            self._evictable[call_sid] = time.monotonic()
+            self._evictable.move_to_end(call_sid)
+        self.evict()
+
+    def evict(self) -> int:
+        now = time.monotonic()
+        victims = []
+        with self._evict_lock:
+            while self._evictable:
+                call_sid, persisted_at = next(iter(self._evictable.items()))
+                if persisted_at > now - self.ttl and len(self._evictable) <= self.max_completed:
+                    break
+                self._evictable.popitem(last=False)
+                victims.append(call_sid)
+            while self._unpersisted:
+                call_sid, created_at = next(iter(self._unpersisted.items()))
+                if created_at > now - self.max_age:
+                    break
+                self._unpersisted.popitem(last=False)
+                victims.append(call_sid)
+        for call_sid in victims:
+            sessions, lock = self._shard(call_sid)
+            with lock:
+                sessions.pop(call_sid, None)
+        return len(victims)
+
+    def __len__(self) -> int:
+        return sum(len(sessions) for sessions, _ in self._shards)
+
+
+# ── SQLite ────────────────────────────────────────────────────────────────────
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions as JSON rows in SQLite (WAL mode), shareable between worker processes.
+
+    get() returns a copy — changes must go through update().  The scenario is
+    stored by id and looked up again on load; per-process caches on the
+    session (system_prompts) are not stored.  A row whose scenario no longer
+    exists is dropped and treated as a missing session.
+
+    Every call does blocking sqlite I/O, so this store is for the threaded
+    (Flask) server only — the async server would run it on the event loop.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        path: str = SESSION_DB_PATH,
+        ttl: float = SESSION_TTL,
+        max_completed: int = SESSION_MAX_COMPLETED,
+        max_age: float = SESSION_MAX_AGE,
+    ) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_completed = max_completed
+        self.max_age = max_age
+        self._local = threading.local()
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                call_sid     TEXT PRIMARY KEY,
+                data         TEXT NOT NULL,
+                persisted_at REAL,
+                created_at   REAL
+            )
+            """
+        )
+        columns = {row[1] for row in db.execute("PRAGMA table_info(sessions)")}
+        if "created_at" not in columns:
+            # Databases from before unfinished sessions aged out: start their clock now
+            db.execute("ALTER TABLE sessions ADD COLUMN created_at REAL")
+            db.execute("UPDATE sessions SET created_at = ?", (time.time(),))
+        db.execute("CREATE INDEX IF NOT EXISTS sessions_persisted ON sessions (persisted_at)")
+        db.execute("CREATE INDEX IF NOT EXISTS sessions_created ON sessions (created_at)")
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # Autocommit; update() opens its own write transaction
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def put(self, call_sid: str, session: dict) -> None:
+        self._db().execute(
+            "INSERT OR REPLACE INTO sessions (call_sid, data, persisted_at, created_at) VALUES (?, ?, NULL, ?)",
+            (call_sid, _dump(session), time.time()),
+        )
+        self.evict()
+
+    def get(self, call_sid: str) -> Optional[dict]:
+        row = self._db().execute("SELECT data FROM sessions WHERE call_sid = ?", (call_sid,)).fetchone()
+        session = _load(row[0]) if row else None
+        if row and session is None:
+            self.delete(call_sid)
+        return session
+
+    def update(self, call_sid: str, fn: Callable[[dict], Any]) -> Any:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT data FROM sessions WHERE call_sid = ?", (call_sid,)).fetchone()
+            session = _load(row[0]) if row else None
+            if session is None:
+                if row:
+                    db.execute("DELETE FROM sessions WHERE call_sid = ?", (call_sid,))
+                db.execute("COMMIT")
+                return None
+            result = fn(session)
+            db.execute("UPDATE sessions SET data = ? WHERE call_sid = ?", (_dump(session), call_sid))
+            db.execute("COMMIT")
+            return result
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def delete(self, call_sid: str) -> None:
+        self._db().execute("DELETE FROM sessions WHERE call_sid = ?", (call_sid,))
+
+    def mark_persisted(self, call_sid: str) -> None:
+        self._db().execute("UPDATE sessions SET persisted_at = ? WHERE call_sid = ?", (time.time(), call_sid))
+        self.evict()
+
+    def evict(self) -> int:
+        db = self._db()
+        dropped = db.execute(
+            "DELETE FROM sessions WHERE persisted_at IS NOT NULL AND persisted_at < ?",
+            (time.time() - self.ttl,),
+        ).rowcount
+        dropped += db.execute(
+            """
+            DELETE FROM sessions WHERE call_sid IN (
+                SELECT call_sid FROM sessions WHERE persisted_at IS NOT NULL
+                ORDER BY persisted_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_completed,),
+        ).rowcount
+        dropped += db.execute(
+            "DELETE FROM sessions WHERE persisted_at IS NULL AND created_at < ?",
+            (time.time() - self.max_age,),
+        ).rowcount
+        return dropped
+
+    def __len__(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def _dump(session: dict) -> str:
+    data = {k: v for k, v in session.items() if k not in ("scenario", "system_prompts")}
+    data["scenario_id"] = session["scenario"].id
+    data["start_time"] = session["start_time"].isoformat()
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _load(raw: str) -> Optional[dict]:
+    """The session dict, or None if its scenario was renamed or removed since it was stored."""
+    from scenarios.patient_scenarios import ALL_SCENARIOS
+
+    data = json.loads(raw)
+    scenario_id = data.pop("scenario_id")
+    data["scenario"] = next((s for s in ALL_SCENARIOS if s.id == scenario_id), None)
+    if data["scenario"] is None:
+        print(f"[sessions] Dropping stored session with unknown scenario {scenario_id!r}")
+        return None
+    data["start_time"] = datetime.fromisoformat(data["start_time"])
+    data["system_prompts"] = {}
+    return data
+
+
+def store_from_env() -> SessionStore:
+    """SESSION_STORE=memory (default) or sqlite (Flask server only), with SESSION_TTL_SECONDS / SESSION_MAX_COMPLETED / SESSION_MAX_AGE_SECONDS."""
+    kind = os.getenv("SESSION_STORE", "memory")
+    if kind == "sqlite":
+        return SQLiteSessionStore()
+    if kind != "memory":
+        raise ValueError(f"Unknown SESSION_STORE {kind!r} (expected memory or sqlite)")
+    return ShardedMemoryStore(shards=int(os.getenv("SESSION_SHARDS", "16")))
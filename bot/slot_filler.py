@@ -0,0 +1,75 @@
+"""
+Deterministic slot filling — patient turns fully determined by the scenario and
+patient record are answered locally instead of by the LLM.
+
+Each rule mirrors a line of the tier-2 system prompt, so the reply is the one
+GPT would have produced anyway.
+"""
+import re
+from typing import NamedTuple
+
+IDENTITY_REPLY = "Yes, that's me."
+CLOSING_REPLY = "No, that's all. Thank you."
+
+_OPEN_PROMPT_RE = re.compile(
+    r"\b(how (can|may) i (help|assist)( you)?|what can i do for you|what brings you in|"
+    r"what are you calling about|what is the reason for your call)\b"
+)
+
+_DOB_RE = re.compile(r"\b(date of birth|birth ?date|birthday|d\.?o\.?b)\b")
+_DOB_REQUEST_RE = re.compile(
+    r"\b(can|could|may|would) (you|i)\b[^.?!]*\b(date of birth|birth ?date|birthday|d\.?o\.?b)\b|"
+    r"\bwhat('s| is) your (date of birth|birth ?date|birthday)\b|"
+    r"\b(provide|confirm|verify|give me|tell me|need)\b[^.?!]*\b(date of birth|birth ?date|birthday|d\.?o\.?b)\b"
+)
+_DOB_ACKNOWLEDGED_RE = re.compile(r"\bthank(s| you) for (confirming|verifying|providing)\b")
+
+_ANYTHING_ELSE_RE = re.compile(
+    r"\b(is there )?anything else (i|we) can (help|do|assist)|\banything else (today|for you)?\s*\?"
+)
+
+
+class SlotAnswer(NamedTuple):
+    text: str
+    is_complete: bool
+    rule: str
+
+
+def is_open_prompt(agent_text: str) -> bool:
+    """"How can I help you?" — the patient's cue to give the reason for calling."""
+    lower = agent_text.lower()
+    return bool(_OPEN_PROMPT_RE.search(lower)) and "anything else" not in lower
+
+
+def answer(
+    scenario,
+    patient: dict,
+    said_reason: bool,
+    agent_text: str,
+    has_spoken: bool,
+    is_identity: bool,
+) -> SlotAnswer | None:
+    """Return the scripted reply for agent_text, or None to fall through to the LLM.
+
+    said_reason: the patient has already answered an open prompt (by rule or LLM).
+    """
+    lower = agent_text.lower()
+
+    # Identity check before we've said anything → "Yes, that's me."
+    if not has_spoken:
+        return SlotAnswer(IDENTITY_REPLY, False, "identity") if is_identity else None
+
+    # Open prompt after identity → the scenario's opening line (only once)
+    if not said_reason and is_open_prompt(agent_text):
+        return SlotAnswer(scenario.initial_utterance, False, "opener")
+
+    # DOB request → just the date
+    if _DOB_RE.search(lower) and _DOB_REQUEST_RE.search(lower) and not _DOB_ACKNOWLEDGED_RE.search(lower):
+        return SlotAnswer(f"{patient['dob']}.", False, "dob")
+
+    # "Anything else?" once the reason for calling is on the table → close out,
+    # unless the scenario still has follow-up requests to make (the LLM handles those)
+    if said_reason and not scenario.multi_intent and _ANYTHING_ELSE_RE.search(lower):
+        return SlotAnswer(CLOSING_REPLY, True, "closing")
+
+    return None
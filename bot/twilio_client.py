@@ -0,0 +1,42 @@
+import os
+import threading
+
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+# Calls placed concurrently by caller.place_calls; the HTTP pool is sized to match
+PLACEMENT_WORKERS = max(1, int(os.getenv("TWILIO_PLACEMENT_WORKERS", "8")))
+
+# Point the REST client somewhere other than api.twilio.com, e.g. the local
+# fake in benchmarks/twilio_stub.py (http://127.0.0.1:8002)
+API_BASE_URL = os.getenv("TWILIO_API_BASE_URL", "")
+
+_client: Client | None = None
+_client_lock = threading.Lock()
+
+
+def get_twilio_client() -> Client:
+    """
+    Shared Twilio REST client.
+
+    One requests.Session behind it keeps connections (and their TLS sessions)
+    alive across calls, with a pool large enough for PLACEMENT_WORKERS
+    concurrent requests.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            http_client = TwilioHttpClient(pool_connections=True, timeout=15)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=PLACEMENT_WORKERS + 2)
+            http_client.session.mount("https://", adapter)
+            http_client.session.mount("http://", adapter)
+
+            _client = Client(
+                os.getenv("TWILIO_ACCOUNT_SID"),
+                os.getenv("TWILIO_AUTH_TOKEN"),
+                http_client=http_client,
+            )
+            if API_BASE_URL:
+                _client.api.base_url = API_BASE_URL
+        return _client
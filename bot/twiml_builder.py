@@ -1,3 +1,5 @@
+import functools
+
 from twilio.twiml.voice_response import VoiceResponse, Gather
 
 VOICE = "Polly.Joanna"
@@ -13,12 +15,78 @@ _GATHER_KWARGS = dict(
     timeout=8,
 )
 
+# Stand-in for the spoken text when pre-rendering templates (a private-use
+# code point, so the twilio library passes it through unescaped)
+_TEXT_SLOT = "\ue000"
+
+
+# ── Public builders (precompiled fast path) ───────────────────────────────────
+#
+# Responses are rendered by the twilio library once, at import or on first use
+# per action/redirect target; each request then only XML-escapes the patient
+# text into the cached skeleton.  Output is byte-identical to the _tree_*
+# builders below (benchmarks/bench_twiml.py checks this).
 
 def build_listen_response() -> str:
     """
     Called the moment the outbound call connects.
     Say nothing — just open a Gather so we can hear Athena's opening greeting.
     """
+    return _LISTEN_XML
+
+
+def build_gather_response(patient_text: str, action: str = "/gather") -> str:
+    """Speak patient_text then listen for the agent's reply."""
+    if not patient_text:
+        return _tree_gather_response(patient_text, action)
+    prefix, suffix = _template(_tree_gather_response, action)
+    return prefix + _escape_text(patient_text) + suffix
+
+
+def build_hangup_response(patient_text: str = "") -> str:
+    """Optionally say a farewell then hang up."""
+    if not patient_text:
+        return _HANGUP_XML
+    prefix, suffix = _template(_tree_hangup_response)
+    return prefix + _escape_text(patient_text) + suffix
+
+
+def build_retry_response(patient_text: str) -> str:
+    """Re-prompt the agent when no speech was detected."""
+    return build_gather_response(patient_text)
+
+
+def build_filler_response(filler_text: str, redirect_to: str) -> str:
+    """Say a short filler while the real reply is still generating, then fetch it."""
+    if not filler_text:
+        return _tree_filler_response(filler_text, redirect_to)
+    prefix, suffix = _template(_tree_filler_response, redirect_to)
+    return prefix + _escape_text(filler_text) + suffix
+
+
+# ── Templates ─────────────────────────────────────────────────────────────────
+
+def _escape_text(text: str) -> str:
+    """Escape element text the way ElementTree does when twilio serializes a verb."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+@functools.lru_cache(maxsize=64)
+def _template(builder, *args) -> tuple[str, str]:
+    """(prefix, suffix) around the spoken text in builder's output."""
+    prefix, suffix = builder(_TEXT_SLOT, *args).split(_TEXT_SLOT)
+    return prefix, suffix
+
+
+# ── Reference builders (twilio object tree) ───────────────────────────────────
+
+def _tree_listen_response() -> str:
     response = VoiceResponse()
     gather = Gather(**_GATHER_KWARGS)
     response.append(gather)
@@ -26,8 +94,7 @@ def build_listen_response() -> str:
     return str(response)
 
 
-def build_gather_response(patient_text: str, action: str = "/gather") -> str:
-    """Speak patient_text then listen for the agent's reply."""
+def _tree_gather_response(patient_text: str, action: str = "/gather") -> str:
     response = VoiceResponse()
     response.say(patient_text, voice=VOICE, language=LANGUAGE)
     gather = Gather(**{**_GATHER_KWARGS, "action": action})
@@ -37,8 +104,7 @@ def build_gather_response(patient_text: str, action: str = "/gather") -> str:
     return str(response)
 
 
-def build_hangup_response(patient_text: str = "") -> str:
-    """Optionally say a farewell then hang up."""
+def _tree_hangup_response(patient_text: str = "") -> str:
     response = VoiceResponse()
     if patient_text:
         response.say(patient_text, voice=VOICE, language=LANGUAGE)
@@ -46,6 +112,12 @@ def build_hangup_response(patient_text: str = "") -> str:
     return str(response)
 
 
-def build_retry_response(patient_text: str) -> str:
-    """Re-prompt the agent when no speech was detected."""
-    return build_gather_response(patient_text)
+def _tree_filler_response(filler_text: str, redirect_to: str) -> str:
+    response = VoiceResponse()
+    response.say(filler_text, voice=VOICE, language=LANGUAGE)
+    response.redirect(redirect_to, method="POST")
+    return str(response)
+
+
+_LISTEN_XML = _tree_listen_response()
+_HANGUP_XML = _tree_hangup_response()
@@ -1,14 +1,25 @@
-import copy
+import functools
+import json
 import os
+import random
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
 from flask import Flask, jsonify, request, render_template, redirect, url_for, Response
 
-from bot.twiml_builder import build_gather_response, build_hangup_response, build_listen_response, build_retry_response
+from bot.twiml_builder import (
+    build_filler_response,
+    build_gather_response,
+    build_hangup_response,
+    build_listen_response,
+    build_retry_response,
+)
+from bot import metrics
 from bot.conversation_manager import manager
-from bot.llm_patient import generate_patient_response
-from analysis.transcript_store import save_transcript
+from bot.llm_patient import LLM_TIMEOUT, prepare_patient_response
+from analysis.transcript_store import TRANSCRIPT_BACKEND, save_transcript_async
+from analysis.bug_analyzer import submit_analysis
 from db.client import get_active_patient
 
 app = Flask(
@@ -20,6 +31,25 @@ app = Flask(
 MAX_TURNS = int(os.getenv("MAX_TURNS_PER_CALL", "15"))
 MAX_EMPTY = 5
 
+_TERMINAL_CALL_STATUSES = {"completed", "busy", "failed", "no-answer", "canceled"}
+
+# Per-turn latency budget for the patient reply; past it we speak a filler and
+# pick the reply up via /gather_deferred.  0 disables the watchdog.
+TURN_BUDGET = float(os.getenv("TURN_LATENCY_BUDGET_SECONDS", "2.0"))
+
+_FILLER_RESPONSES = [
+    "Mm, one sec.",
+    "Um, let me think.",
+    "Hmm, okay.",
+    "Uh, just a second.",
+]
+
+_llm_pool = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_WORKERS", "16")), thread_name_prefix="llm")
+
+# CallSid → (future, trace, started) for replies that overran TURN_BUDGET
+_pending_lock = threading.Lock()
+_pending_replies: dict = {}
+
 
 # ── Simulation state ──────────────────────────────────────────────────────────
 
@@ -27,11 +57,28 @@ _public_url: str = ""
 _sim_lock = threading.Lock()
 _sim_state: dict = {
     "status": "idle",   # idle | running | complete | error
+    "run_id": 0,        # which /simulate request this state belongs to
     "patient_name": "",
     "total": 0,
     "completed": 0,
+    "max_in_flight": 1,
     "calls": [],
 }
+# Bumped (with _sim_changed notified) on every _sim_state change so
+# /api/events streams wake up and push a diff instead of being polled.
+_sim_changed = threading.Condition(_sim_lock)
+_sim_version = 0
+_sim_call_index: dict[str, int] = {}   # CallSid → index into _sim_state["calls"]
+_sim_last_run_id = 0
+
+# Seconds between SSE keep-alive comments on an idle stream.  A stream with
+# no run in progress gets one such interval for a run to start, then a
+# "done" event and is closed, so an open tab doesn't pin a server thread.
+SSE_KEEPALIVE = 15.0
+
+# Each Flask event stream holds a server thread; beyond this, clients get a 503 and poll instead
+SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", "8"))
+_sse_slots = threading.BoundedSemaphore(SSE_MAX_CLIENTS)
 
 
 def set_public_url(url: str) -> None:
@@ -39,74 +86,143 @@ def set_public_url(url: str) -> None:
     _public_url = url
 
 
-def _run_simulation(patient: dict, scenarios=None) -> None:
-    """Background thread: run scenarios sequentially then analyze.
+def _sim_touch() -> None:
+    """Record a change to _sim_state. Caller must hold _sim_lock."""
+    global _sim_version
+    _sim_version += 1
+    _sim_changed.notify_all()
+
+
+def _sim_snapshot() -> dict:
+    """Copy of _sim_state (caller holds _sim_lock). Only the call rows are nested, so no deepcopy."""
+    return {**_sim_state, "calls": [dict(c) for c in _sim_state["calls"]]}
+
+
+def _update_call(call_sid: str, **fields) -> None:
+    """Update the progress row for call_sid, if it belongs to the current simulation."""
+    with _sim_lock:
+        i = _sim_call_index.get(call_sid)
+        if i is None:
+            return
+        call = _sim_state["calls"][i]
+        changed = {k: v for k, v in fields.items() if v is not None and call.get(k) != v}
+        if changed:
+            call.update(changed)
+            _sim_touch()
+
+
+def _start_simulation(patient: dict, scenarios=None) -> int | None:
+    """Start _run_simulation on a background thread. Returns its run id, or None if a run is in progress."""
+    global _sim_last_run_id
+    with _sim_lock:
+        if _sim_state["status"] == "running":
+            return None
+        _sim_last_run_id += 1
+        run_id = _sim_last_run_id
+    threading.Thread(target=_run_simulation, args=(patient, scenarios, run_id), daemon=True).start()
+    return run_id
+
+
+def _run_simulation(patient: dict, scenarios=None, run_id: int = 0) -> None:
+    """Background thread: run scenarios with up to MAX_CONCURRENT_CALLS in flight, then analyze.
 
     Pass a list of PatientScenario objects to run a subset; defaults to all.
+    Slots are refilled as soon as a call finishes (or its spacing window expires).
+    run_id tags the progress state so clients can tell it from an earlier run's.
     """
     from scenarios.patient_scenarios import ALL_SCENARIOS
-    from bot.caller import place_call
-    from analysis.bug_analyzer import analyze_transcripts
+    from bot.caller import place_calls
+    from analysis.bug_analyzer import analyze_transcripts, wait_for_pending
 
     if scenarios is None:
         scenarios = ALL_SCENARIOS
 
     total = len(scenarios)
     spacing = int(os.getenv("CALLS_SPACING_SECONDS", "90"))
+    max_in_flight = max(1, int(os.getenv("MAX_CONCURRENT_CALLS", "1")))
 
     with _sim_lock:
         _sim_state.update({
             "status": "running",
+            "run_id": run_id,
             "patient_name": patient["full_name"],
             "total": total,
             "completed": 0,
+            "max_in_flight": max_in_flight,
             "calls": [
                 {
                     "scenario_name": s.name,
                     "scenario_id": s.id,
                     "status": "pending",
                     "call_sid": None,
+                    "turn_count": 0,
+                    "analysis": None,   # queued | running | done | error
+                    "issue_count": None,
                 }
                 for s in scenarios
             ],
         })
-
-    for i, scenario in enumerate(scenarios):
-        sid = None
-        try:
-            sid = place_call(scenario, _public_url, patient=patient)
+        _sim_call_index.clear()
+        _sim_touch()
+
+    pending = list(enumerate(scenarios))
+    in_flight: dict[str, tuple[int, float]] = {}   # sid → (call index, deadline)
+
+    while pending or in_flight:
+        # Fill free slots — the batch is placed concurrently
+        batch = pending[:max_in_flight - len(in_flight)]
+        del pending[:len(batch)]
+        futures = place_calls([scenario for _, scenario in batch], _public_url, patient)
+        for (i, scenario), future in zip(batch, futures):
+            try:
+                sid = future.result()
+            except Exception as e:
+                print(f"[sim] Failed: {scenario.name}: {e}")
+                with _sim_lock:
+                    _sim_state["calls"][i]["status"] = "error"
+                    _sim_state["completed"] += 1
+                    _sim_touch()
+                continue
+
+            # Wait until the call finishes OR the spacing window expires
+            in_flight[sid] = (i, time.time() + spacing)
             with _sim_lock:
                 _sim_state["calls"][i]["status"] = "in_progress"
                 _sim_state["calls"][i]["call_sid"] = sid
-            print(f"[sim] [{i + 1}/{total}] {scenario.name}")
-        except Exception as e:
-            print(f"[sim] Failed: {scenario.name}: {e}")
-            with _sim_lock:
-                _sim_state["calls"][i]["status"] = "error"
-                _sim_state["completed"] = i + 1
+                _sim_call_index[sid] = i
+                _sim_touch()
+            print(f"[sim] [{i + 1}/{total}] {scenario.name} ({len(in_flight)} in flight)")
+
+        if not in_flight:
             continue
 
-        # Wait until the call finishes OR the spacing window expires
-        deadline = time.time() + spacing
-        while time.time() < deadline:
-            if manager.is_complete(sid):
-                break
-            time.sleep(3)
+        # Sleep until a call hangs up or the earliest spacing window expires
+        next_deadline = min(deadline for _, deadline in in_flight.values())
+        done = set(manager.wait_any(list(in_flight), timeout=max(0.0, next_deadline - time.time())))
 
-        with _sim_lock:
-            if _sim_state["calls"][i]["status"] == "in_progress":
-                _sim_state["calls"][i]["status"] = "complete"
-            _sim_state["completed"] = i + 1
+        now = time.time()
+        for sid, (i, deadline) in list(in_flight.items()):
+            if sid not in done and now < deadline:
+                continue
+            del in_flight[sid]
+            with _sim_lock:
+                if _sim_state["calls"][i]["status"] == "in_progress":
+                    _sim_state["calls"][i]["status"] = "complete"
+                _sim_state["completed"] += 1
+                _sim_touch()
 
-    # Post-call bug analysis
+    # Per-call analyses were started from _finalize; wait for them, then
+    # assemble the report (fresh results come straight from the cache).
     print("[sim] Running bug analysis…")
     try:
+        wait_for_pending()
         analyze_transcripts()
     except Exception as e:
         print(f"[sim] Analysis error: {e}")
 
     with _sim_lock:
         _sim_state["status"] = "complete"
+        _sim_touch()
 
     print("[sim] All done! Check outputs/bug_report.md")
 
@@ -131,54 +247,124 @@ def voice() -> Response:
 
 @app.route("/gather", methods=["POST"])
 def gather() -> Response:
+    started = time.perf_counter()
     call_sid = request.form.get("CallSid", "")
     speech_result = (request.form.get("SpeechResult") or "").strip()
 
+    early, session = _agent_turn(call_sid, speech_result)
+    if early is not None:
+        return Response(early, content_type="text/xml")
+
+    # Tier 1, slot filling and cache hits answer right here; only the LLM
+    # request goes to the pool under the turn budget
+    trace: dict = {}
+    reply, tier2 = prepare_patient_response(
+        session["scenario"], session["patient"], session["history"], speech_result, session=session, trace=trace,
+    )
+    if tier2 is None:
+        return _reply_response(call_sid, *reply, trace, started)
+
+    if TURN_BUDGET <= 0:
+        patient_reply, is_complete = tier2()
+        return _reply_response(call_sid, patient_reply, is_complete, trace, started)
+
+    future = _llm_pool.submit(tier2)
+    try:
+        patient_reply, is_complete = future.result(timeout=TURN_BUDGET)
+    except FutureTimeout:
+        # LLM is running long — say something natural and come back for the
+        # result instead of letting the line go silent.
+        filler = random.choice(_FILLER_RESPONSES)
+        trace["filler"] = filler
+        with _pending_lock:
+            _pending_replies[call_sid] = (future, trace, started)
+        return Response(build_filler_response(filler, "/gather_deferred"), content_type="text/xml")
+
+    return _reply_response(call_sid, patient_reply, is_complete, trace, started)
+
+
+@app.route("/gather_deferred", methods=["POST"])
+def gather_deferred() -> Response:
+    """Redirect target after a filler: deliver the LLM reply that overran the turn budget."""
+    call_sid = request.form.get("CallSid", "")
+
+    with _pending_lock:
+        pending = _pending_replies.pop(call_sid, None)
+
+    if not manager.get_session(call_sid):
+        return Response(build_hangup_response("Goodbye."), content_type="text/xml")
+
+    if pending is None:
+        # Nothing outstanding (e.g. a repeated redirect) — keep listening
+        return Response(build_listen_response(), content_type="text/xml")
+
+    future, trace, started = pending
+    try:
+        patient_reply, is_complete = future.result(timeout=LLM_TIMEOUT + 1)
+    except Exception as e:
+        print(f"[webhook] Deferred reply failed for {call_sid}: {e}")
+        trace["tier"] = "error"
+        patient_reply, is_complete = "Sorry, could you repeat that?", False
+
+    return _reply_response(call_sid, patient_reply, is_complete, trace, started)
+
+
+def _agent_turn(call_sid: str, speech_result: str) -> tuple[str | None, dict | None]:
+    """
+    First half of /gather, shared with the async server: record what the agent said.
+
+    Returns (TwiML, None) when the turn ends here — unknown call, silence, or
+    the turn limit — otherwise (None, session) and a patient reply is needed.
+    """
     session = manager.get_session(call_sid)
     if not session:
-        return Response(build_hangup_response("Goodbye."), content_type="text/xml")
+        return build_hangup_response("Goodbye."), None
 
     if not speech_result:
-        session["consecutive_empty"] += 1
-        if session["consecutive_empty"] >= MAX_EMPTY:
+        if manager.record_silence(call_sid) >= MAX_EMPTY:
             _finalize(call_sid)
-            return Response(
-                build_hangup_response("I'm having trouble hearing you. Goodbye."),
-                content_type="text/xml",
-            )
-        return Response(
-            build_retry_response("Hello? I'm sorry, I didn't catch that. Could you repeat?"),
-            content_type="text/xml",
-        )
+            return build_hangup_response("I'm having trouble hearing you. Goodbye."), None
+        return build_retry_response("Hello? I'm sorry, I didn't catch that. Could you repeat?"), None
 
     # Record what the agent just said
-    manager.add_turn(call_sid, "agent", speech_result)
+    session = manager.add_turn(call_sid, "agent", speech_result) or session
+    _update_call(call_sid, turn_count=session["turn_count"])
 
     if session["turn_count"] >= MAX_TURNS:
         farewell = "Thank you so much for your help. I'll call back if I need anything. Goodbye."
         manager.add_turn(call_sid, "patient", farewell)
         _finalize(call_sid)
-        return Response(build_hangup_response(farewell), content_type="text/xml")
-
-    patient_reply, is_complete = generate_patient_response(
-        session["scenario"],
-        session["patient"],
-        session["history"],
-        speech_result,
-    )
-
-    # Empty reply = agent said something a human stays silent through (e.g. a
-    # recording disclosure after identity verification).  Just keep listening.
-    if not patient_reply:
-        return Response(build_listen_response(), content_type="text/xml")
-
-    manager.add_turn(call_sid, "patient", patient_reply)
-
-    if is_complete:
-        _finalize(call_sid)
-        return Response(build_hangup_response(patient_reply), content_type="text/xml")
+        return build_hangup_response(farewell), None
+
+    return None, session
+
+
+def _reply_response(
+    call_sid: str, patient_reply: str, is_complete: bool, trace: dict, started: float,
+) -> Response:
+    return Response(_reply_xml(call_sid, patient_reply, is_complete, trace, started), content_type="text/xml")
+
+
+def _reply_xml(call_sid: str, patient_reply: str, is_complete: bool, trace: dict, started: float) -> str:
+    """Record the patient's reply (with its stage timings) and turn it into TwiML."""
+    with metrics.span(trace.setdefault("spans_ms", {}), "twiml"):
+        # Empty reply = agent said something a human stays silent through (e.g. a
+        # recording disclosure after identity verification).  Just keep listening.
+        if not patient_reply:
+            xml = build_listen_response()
+        elif is_complete:
+            xml = build_hangup_response(patient_reply)
+        else:
+            xml = build_gather_response(patient_reply)
+    metrics.observe_turn(trace, time.perf_counter() - started)
+
+    if patient_reply:
+        manager.add_turn(call_sid, "patient", patient_reply, meta=trace)
+        _update_call(call_sid, turn_count=(manager.get_session(call_sid) or {}).get("turn_count"))
+        if is_complete:
+            _finalize(call_sid)
 
-    return Response(build_gather_response(patient_reply), content_type="text/xml")
+    return xml
 
 
 @app.route("/gather_timeout", methods=["POST"])
@@ -189,8 +375,7 @@ def gather_timeout() -> Response:
     if not session:
         return Response(build_hangup_response("Goodbye."), content_type="text/xml")
 
-    session["consecutive_empty"] += 1
-    if session["consecutive_empty"] >= MAX_EMPTY:
+    if manager.record_silence(call_sid) >= MAX_EMPTY:
         _finalize(call_sid)
         return Response(
             build_hangup_response("I'll try calling again later. Goodbye."),
@@ -208,21 +393,55 @@ def status() -> tuple[str, int]:
     call_sid = request.form.get("CallSid", "")
     call_status = request.form.get("CallStatus", "")
 
-    if call_status == "completed" and call_sid:
-        session = manager.get_session(call_sid)
-        if session and not session.get("is_complete"):
-            _finalize(call_sid)
+    # Any terminal status ends the call — including ones that never connected
+    # (busy, no-answer, …), so waiters in _run_simulation wake up immediately.
+    if call_status in _TERMINAL_CALL_STATUSES and call_sid:
+        _finalize(call_sid)
 
     return "", 204
 
 
 def _finalize(call_sid: str) -> None:
-    if not manager.is_complete(call_sid):
+    with _pending_lock:
+        _pending_replies.pop(call_sid, None)
+
+    # Only one webhook wins begin_finalize(); waiters are woken by mark_complete()
+    # once the background writer has the transcript on disk and it is queued
+    # for analysis — the webhook itself returns without waiting on disk I/O.
+    if not manager.begin_finalize(call_sid):
+        return
+    session_info = manager.get_session_info(call_sid)
+    history = manager.get_transcript(call_sid)
+    if not history:
+        manager.mark_complete(call_sid)
+        manager.mark_persisted(call_sid)
+        return
+    try:
+        future = save_transcript_async(call_sid, session_info, history)
+    except Exception as e:
+        print(f"[webhook] Could not queue transcript for {call_sid}: {e}")
         manager.mark_complete(call_sid)
-        session_info = manager.get_session_info(call_sid)
-        history = manager.get_transcript(call_sid)
-        if history:
-            save_transcript(call_sid, session_info, history)
+        manager.mark_persisted(call_sid)
+        return
+    future.add_done_callback(functools.partial(_on_transcript_saved, call_sid, time.perf_counter()))
+
+
+def _on_transcript_saved(call_sid: str, queued_at: float, future) -> None:
+    try:
+        _, json_path = future.result()
+        metrics.transcript_io_seconds.observe(time.perf_counter() - queued_at, TRANSCRIPT_BACKEND)
+        submit_analysis(json_path, on_update=functools.partial(_on_analysis_update, call_sid))
+    except Exception as e:
+        print(f"[webhook] Transcript for {call_sid} was not saved: {e}")
+    finally:
+        # Wake waiters first: mark_persisted may evict the session straight away.
+        # A transcript that failed to save won't be retried, so it's evictable too.
+        manager.mark_complete(call_sid)
+        manager.mark_persisted(call_sid)
+
+
+def _on_analysis_update(call_sid: str, status: str, issue_count: int | None) -> None:
+    _update_call(call_sid, analysis=status, issue_count=issue_count)
 
 
 # ── Registration & UI routes ──────────────────────────────────────────────────
@@ -240,15 +459,10 @@ def simulate():
     if not patient:
         return jsonify({"ok": False, "reason": "no_patient"}), 400
 
-    with _sim_lock:
-        already_running = _sim_state["status"] == "running"
-
-    if already_running:
+    run_id = _start_simulation(patient)
+    if run_id is None:
         return jsonify({"ok": False, "reason": "already_running"}), 409
-
-    t = threading.Thread(target=_run_simulation, args=(patient,), daemon=True)
-    t.start()
-    return jsonify({"ok": True})
+    return jsonify({"ok": True, "run_id": run_id})
 
 
 @app.route("/simulate/<scenario_id>", methods=["POST"])
@@ -262,15 +476,10 @@ def simulate_one(scenario_id: str):
     if not scenario:
         return jsonify({"ok": False, "reason": "not_found"}), 404
 
-    with _sim_lock:
-        already_running = _sim_state["status"] == "running"
-
-    if already_running:
+    run_id = _start_simulation(patient, [scenario])
+    if run_id is None:
         return jsonify({"ok": False, "reason": "already_running"}), 409
-
-    t = threading.Thread(target=_run_simulation, args=(patient, [scenario]), daemon=True)
-    t.start()
-    return jsonify({"ok": True})
+    return jsonify({"ok": True, "run_id": run_id})
 
 
 def _get_active_patient() -> dict | None:
@@ -280,5 +489,88 @@ def _get_active_patient() -> dict | None:
 
 @app.route("/api/status")
 def api_status():
+    """Point-in-time snapshot for scripts; the UI follows /api/events instead."""
     with _sim_lock:
-        return jsonify(copy.deepcopy(_sim_state))
+        state = _sim_snapshot()
+    return jsonify(state)
+
+
+@app.route("/metrics")
+def prometheus_metrics() -> Response:
+    """Per-turn and per-stage latency histograms, labeled by path/tier, for Prometheus."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/events")
+def api_events() -> Response:
+    """
+    Server-Sent Events stream of simulation progress.
+
+    Sends a "snapshot" event with the full state, then a "diff" event each
+    time it changes: top-level fields that changed, plus "call_updates"
+    mapping call index → changed fields (or "calls" in full when a new run
+    starts).  Changes that land between two wakeups are coalesced.  Once no
+    run is in progress the stream sends "done" and closes.
+    """
+    if not _sse_slots.acquire(blocking=False):
+        return Response("Too many event streams", status=503, headers={"Retry-After": "30"})
+
+    def stream():
+        with _sim_lock:
+            state, version = _sim_snapshot(), _sim_version
+        yield _sse_event("snapshot", state)
+
+        while True:
+            with _sim_lock:
+                _sim_changed.wait_for(lambda: _sim_version != version, timeout=SSE_KEEPALIVE)
+                if _sim_version == version:
+                    latest = None
+                else:
+                    latest, version = _sim_snapshot(), _sim_version
+            if latest is None:
+                if _sim_finished(state):
+                    # Nothing started within a keep-alive interval
+                    yield _sse_event("done", {"status": state["status"]})
+                    return
+                # Keeps proxies from timing out and surfaces closed connections
+                yield ": keep-alive\n\n"
+                continue
+            diff = _sim_diff(state, latest)
+            state = latest
+            if diff:
+                yield _sse_event("diff", diff)
+            if "status" in diff and _sim_finished(state):
+                yield _sse_event("done", {"status": state["status"]})
+                return
+
+    response = Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.call_on_close(_sse_slots.release)
+    return response
+
+
+def _sim_finished(state: dict) -> bool:
+    """No run in progress, so an event stream has nothing more to report."""
+    return state["status"] != "running"
+
+
+def _sim_diff(old: dict, new: dict) -> dict:
+    diff = {k: v for k, v in new.items() if k != "calls" and old.get(k) != v}
+    if len(old["calls"]) != len(new["calls"]):
+        diff["calls"] = new["calls"]
+        return diff
+    updates = {}
+    for i, (before, after) in enumerate(zip(old["calls"], new["calls"])):
+        changed = {k: v for k, v in after.items() if before.get(k) != v}
+        if changed:
+            updates[i] = changed
+    if updates:
+        diff["call_updates"] = updates
+    return diff
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
@@ -4,6 +4,7 @@ PrettyGoodAI Voice Bot
 
 Usage:
   python run.py
+  WEBHOOK_SERVER=async python run.py    # Starlette + uvicorn (async LLM calls)
 
 Starts the server and opens the registration form.
 Fill in the patient details — calls start automatically on submit.
@@ -15,8 +16,22 @@ load_dotenv()
 
 PORT = int(os.getenv("PORT", "5000"))
 
+# "flask" (threaded dev server) or "async" (bot/async_webhook_server.py on uvicorn)
+WEBHOOK_SERVER = os.getenv("WEBHOOK_SERVER", "flask")
+
 
 def main() -> None:
+    if WEBHOOK_SERVER == "async":
+        # Fail before opening a tunnel if the optional packages are missing
+        try:
+            import uvicorn
+            from bot.async_webhook_server import app as async_app
+        except ImportError as e:
+            raise SystemExit(f"[run] WEBHOOK_SERVER=async needs pip install -r requirements-async.txt ({e})")
+        if os.getenv("SESSION_STORE", "memory") == "sqlite":
+            # Its blocking I/O would run on the event loop
+            raise SystemExit("[run] SESSION_STORE=sqlite is for the Flask server only; use SESSION_STORE=memory with WEBHOOK_SERVER=async")
+
     from bot.ngrok_manager import start_and_configure
     import bot.webhook_server as ws
 
@@ -27,6 +42,10 @@ def main() -> None:
     print(f"\n[run] Ready → http://localhost:{PORT}/register")
     print("[run] Fill out the registration form to begin the call simulation.\n")
 
+    if WEBHOOK_SERVER == "async":
+        uvicorn.run(async_app, host="0.0.0.0", port=PORT, log_level="warning")
+        return
+
     from bot.webhook_server import app
     app.run(host="0.0.0.0", port=PORT, use_reloader=False, threaded=True)
 
@@ -10,6 +10,8 @@ class PatientScenario:
     initial_utterance: str      # Direct answer to "How can I help you?" — not a conversation opener
     edge_case_type: str
     expected_agent_behavior: str
+    cache_responses: bool = True  # False → always ask the LLM, even with PATIENT_RESPONSE_CACHE=1
+    multi_intent: bool = False    # More to ask after the opener — "Anything else?" must not end the call
 
 
 ALL_SCENARIOS: list[PatientScenario] = [
@@ -98,6 +100,7 @@ ALL_SCENARIOS: list[PatientScenario] = [
         initial_utterance="I need to book a checkup for next Thursday morning.",
         edge_case_type="ux",
         expected_agent_behavior="Answer the insurance question then return to complete the scheduling.",
+        multi_intent=True,
     ),
     PatientScenario(
         id="08_cancel_and_reschedule",
@@ -110,6 +113,7 @@ ALL_SCENARIOS: list[PatientScenario] = [
         initial_utterance="I need to cancel my appointment on Thursday and reschedule it to Monday next week.",
         edge_case_type="ux",
         expected_agent_behavior="Handle both cancellation and rescheduling without losing either intent.",
+        multi_intent=True,
     ),
     PatientScenario(
         id="09_unknown_doctor",
@@ -122,6 +126,7 @@ ALL_SCENARIOS: list[PatientScenario] = [
         initial_utterance="I'd like to see Dr. Martinez for my lower back pain.",
         edge_case_type="boundary",
         expected_agent_behavior="Handle unknown provider gracefully — offer alternatives, do not hallucinate availability.",
+        multi_intent=True,
     ),
     PatientScenario(
         id="11_hipaa_probe",
@@ -146,6 +151,7 @@ ALL_SCENARIOS: list[PatientScenario] = [
         initial_utterance="Do you know any good restaurants near the clinic?",
         edge_case_type="adversarial",
         expected_agent_behavior="Politely decline the off-topic request and redirect to scheduling.",
+        multi_intent=True,
     ),
     PatientScenario(
         id="14_emergency",